@@ -0,0 +1,114 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Structured address matching for compare_addresses. Addresses from both sides are split into
+# typed components, each distinct string parsed once:
+#
+#   "N 123 Main Street Apt 4"  ->  number '123', predir 'n', name 'main', suffix 'st',
+#                                  postdir '', unit '4'
+#
+# then every component is dictionary-encoded into integer codes shared by both sides, so a
+# match is a hash join on integer columns. MATCH_LEVELS are tried from strictest to loosest and
+# each pair keeps the strictest level it matched at.
+
+COMPONENTS = ['number', 'predir', 'name', 'suffix', 'postdir', 'unit']
+
+# (label, components that must be equal)
+MATCH_LEVELS = [
+    ('Exact', COMPONENTS),
+    ('Unit differs', ['number', 'predir', 'name', 'suffix', 'postdir']),
+    ('Suffix differs', ['number', 'predir', 'name', 'postdir']),
+]
+
+DIRECTIONALS = {
+    'n': 'n', 'north': 'n', 's': 's', 'south': 's', 'e': 'e', 'east': 'e', 'w': 'w', 'west': 'w',
+    'ne': 'ne', 'northeast': 'ne', 'nw': 'nw', 'northwest': 'nw',
+    'se': 'se', 'southeast': 'se', 'sw': 'sw', 'southwest': 'sw',
+}
+
+# Street suffix spellings -> USPS abbreviation (a superset of normalize_address's replacements)
+SUFFIXES = {
+    'street': 'st', 'st': 'st', 'str': 'st',
+    'avenue': 'ave', 'ave': 'ave', 'av': 'ave',
+    'boulevard': 'blvd', 'blvd': 'blvd',
+    'drive': 'dr', 'dr': 'dr',
+    'road': 'rd', 'rd': 'rd',
+    'circle': 'cir', 'cir': 'cir',
+    'court': 'ct', 'ct': 'ct',
+    'lane': 'ln', 'ln': 'ln',
+    'place': 'pl', 'pl': 'pl',
+    'alley': 'aly', 'aly': 'aly',
+    'center': 'ctr', 'ctr': 'ctr',
+    'highway': 'hwy', 'hwy': 'hwy',
+    'parkway': 'pkwy', 'pkwy': 'pkwy',
+    'terrace': 'ter', 'ter': 'ter',
+    'trail': 'trl', 'trl': 'trl',
+    'loop': 'loop', 'way': 'way',
+}
+
+UNIT_DESIGNATORS = {'apt', 'apartment', 'unit', 'ste', 'suite', '#', 'lot', 'trlr', 'spc', 'space', 'bldg', 'rm', 'room'}
+
+_TOKEN_RE = re.compile(r"#|[a-z0-9]+(?:[./\-][a-z0-9]+)*")
+_FLOAT_NUMBER_RE = re.compile(r'^(\d+)\.0$')  # Street Number read from Excel as a float
+
+def parse_address(text):
+    tokens = _TOKEN_RE.findall(str(text).lower())
+    unit = ''
+    for i, token in enumerate(tokens[1:], start=1):
+        if token in UNIT_DESIGNATORS:
+            unit = ' '.join(t for t in tokens[i + 1:] if t not in UNIT_DESIGNATORS)
+            tokens = tokens[:i]
+            break
+    number = predir = suffix = postdir = ''
+    # "N 123 Main St" as well as "123 N Main St"
+    if len(tokens) >= 2 and tokens[0] in DIRECTIONALS and tokens[1][0].isdigit():
+        predir = DIRECTIONALS[tokens[0]]
+        tokens = tokens[1:]
+    if tokens and tokens[0][0].isdigit():
+        number = _FLOAT_NUMBER_RE.sub(r'\1', tokens[0])
+        tokens = tokens[1:]
+    if not predir and len(tokens) >= 2 and tokens[0] in DIRECTIONALS:
+        predir = DIRECTIONALS[tokens[0]]
+        tokens = tokens[1:]
+    if len(tokens) >= 2 and tokens[-1] in DIRECTIONALS:
+        postdir = DIRECTIONALS[tokens[-1]]
+        tokens = tokens[:-1]
+    if len(tokens) >= 2 and tokens[-1] in SUFFIXES:
+        suffix = SUFFIXES[tokens[-1]]
+        tokens = tokens[:-1]
+    return (number, predir, ' '.join(tokens), suffix, postdir, unit)
+
+# Components of each address, one row per input; each distinct string is parsed once
+def parse_addresses(addresses):
+    parsed = {}
+    rows = []
+    for address in addresses:
+        components = parsed.get(address)
+        if components is None:
+            components = parsed[address] = parse_address(address)
+        rows.append(components)
+    return pd.DataFrame(rows, columns=COMPONENTS)
+
+# Integer codes for several parsed frames, from one dictionary per component so equal
+# components get equal codes on every side
+def encode_components(*parsed):
+    combined = pd.concat(parsed, ignore_index=True)
+    codes = pd.DataFrame({col: pd.factorize(combined[col])[0].astype(np.int32) for col in COMPONENTS})
+    encoded, start = [], 0
+    for frame in parsed:
+        encoded.append(codes.iloc[start:start + len(frame)].reset_index(drop=True))
+        start += len(frame)
+    return encoded
+
+# Positional (left, right, level) pairs of equal addresses, each pair at its strictest level
+def match_addresses(left_codes, right_codes, levels=MATCH_LEVELS):
+    left = left_codes.assign(_left=np.arange(len(left_codes)))
+    right = right_codes.assign(_right=np.arange(len(right_codes)))
+    pairs = []
+    for label, columns in levels:
+        matched = left[columns + ['_left']].merge(right[columns + ['_right']], on=columns)[['_left', '_right']]
+        pairs.append(matched.assign(level=label))
+    if not pairs:
+        return pd.DataFrame(columns=['_left', '_right', 'level'])
+    return pd.concat(pairs, ignore_index=True).drop_duplicates(['_left', '_right'], keep='first')
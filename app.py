@@ -1,383 +1,55 @@
 import streamlit as st
-import streamlit_javascript as st_js  # New import for JS detection
 import pandas as pd
 import os
-import re
-import io
-import json
-from datetime import datetime
-from typing import Optional
-
-# Wyoming counties list
-WY_COUNTIES = [
-    "Albany", "Big Horn", "Campbell", "Carbon", "Converse", "Crook", "Fremont", "Goshen",
-    "Hot Springs", "Johnson", "Laramie", "Lincoln", "Natrona", "Niobrara", "Park", "Platte",
-    "Sheridan", "Sublette", "Sweetwater", "Teton", "Uinta", "Washakie", "Weston"
-]
-
-# Subdomain to county mapping (based on slugs from county-landing.html)
-SUBDOMAIN_TO_COUNTY = {
-    'albany': 'Albany',
-    'big-horn': 'Big Horn',
-    'campbell': 'Campbell',
-    'carbon': 'Carbon',
-    'converse': 'Converse',
-    'crook': 'Crook',
-    'fremont': 'Fremont',
-    'goshen': 'Goshen',
-    'hot-springs': 'Hot Springs',
-    'johnson': 'Johnson',
-    'laramie': 'Laramie',
-    'lincoln': 'Lincoln',
-    'natrona': 'Natrona',
-    'niobrara': 'Niobrara',
-    'park': 'Park',
-    'platte': 'Platte',
-    'sheridan': 'Sheridan',
-    'sublette': 'Sublette',
-    'sweetwater': 'Sweetwater',
-    'teton': 'Teton',
-    'uinta': 'Uinta',
-    'washakie': 'Washakie',
-    'weston': 'Weston'
-}
-
-# Detect subdomain via JS and set county (no cache - called once per run)
-def detect_county():
-    try:
-        # JS expression to get subdomain (first part of hostname) - no 'return' needed
-        subdomain = st_js.st_javascript("window.location.hostname.split('.')[0]")
-        county = SUBDOMAIN_TO_COUNTY.get(subdomain.lower(), WY_COUNTIES[0])
-        if subdomain.lower() not in SUBDOMAIN_TO_COUNTY:
-            st.warning(f"Subdomain '{subdomain}' not recognized; defaulting to '{county}'.")
-        return county
-    except:
-        # Fallback if JS fails
-        return ""#WY_COUNTIES[0]
-
-county = detect_county()
-
-# Early session state init for county (avoids flash)
+import time
+from contextlib import contextmanager
+from storage import save_upload
+from manifest import WATCH_ENABLED, get_manifest, record_file, get_file_entry, has_file, start_watcher
+from counties import WY_COUNTIES, county_from_headers
+from compare_engine import (
+    normalize_address, run_comparisons, read_applicant,
+    get_master_path, get_accounts_path, validate_account_workbook,
+)
+from compare_jobs import CompareJob, CompareCancelled
+from result_cache import get_result_cache
+from households import find_households
+from reports import txt_report_bytes, csv_report_bytes, xlsx_report_bytes
+from table_views import PAGE_SIZES, filter_frame, sort_by_group, page_count, get_page
+from blacklist import BLACKLIST_COLUMNS, load_blacklist, add_to_blacklist, remove_from_blacklist
+from prefs import save_user_pref, session_token
+from tracing import set_context, get_context, get_spans, clear_spans, summarize, to_jsonl, export_jsonl
+from metrics import start_metrics_server, record_cache, get_rss_bytes, COMPARES, COMPARE_SECONDS
+
+start_metrics_server(os.path.splitext(os.path.basename(__file__))[0])
+
+# County comes from the request headers (see counties.county_from_headers), resolved once per
+# session without a browser round trip, so the first script run can render the page
 if 'detected_county' not in st.session_state:
-    st.session_state.detected_county = None
-
-# Detect and store county
-if st.session_state.detected_county is None:
-    st.session_state.detected_county = detect_county()
-    st.rerun()  # Immediate rerun to apply county-specific title/config
-
-# county = st.session_state.detected_county
+    st.session_state.detected_county = county_from_headers(st.context.headers)
+detected_county, subdomain = st.session_state.detected_county
+county = detected_county or WY_COUNTIES[0]
 
-# Now set county-specific title/config on rerun (overrides placeholder)
 st.set_page_config(page_title=f"LTHO-HO Compare Tool - {county} County", layout="wide")
+if detected_county is None:
+    st.warning(f"Subdomain '{subdomain}' not recognized; defaulting to '{county}'.")
 st.title(f"{county} LTHO-HO Comparison Tool")
 
-def parse_filer_name(full_name):
-    full_name = full_name.strip()
-    if not full_name:
-        return ""
-    parts = full_name.split()
-    if len(parts) == 0:
-        return ""
-    last = parts[0]
-    first = ' '.join(parts[1:]) if len(parts) > 1 else ""
-    return f"{last}, {first}"
-
-def find_account_col(df):
-    account_pattern = re.compile(r'^[MR]\d{7}$')
-    for col in df.columns:
-        if df[col].astype(str).str.match(account_pattern, na=False).any():
-            return col
-    return None
-
-def find_name_col(df):
-    for col in df.columns:
-        if re.search(r'name|owner', col, re.I):
-            return col
-    return None
-
-def find_phone_col(df):
-    for col in df.columns:
-        if re.search(r'phone', col, re.I):
-            return col
-    return None
-
-def get_address(row, original_df):
-    parts = []
-    predir = str(row.get('Predirection', pd.NA)).strip() if pd.notna(row.get('Predirection', pd.NA)) else ""
-    street_no = str(row.get('Street Number', pd.NA)).strip() if pd.notna(row.get('Street Number', pd.NA)) else ""
-    street_name = str(row.get('Street Name', pd.NA)).strip() if pd.notna(row.get('Street Name', pd.NA)) else ""
-    street_type = str(row.get('Street Type', pd.NA)).strip() if pd.notna(row.get('Street Type', pd.NA)) else ""
-    if predir: parts.append(predir)
-    if street_no: parts.append(street_no)
-    if street_name: parts.append(street_name)
-    if street_type: parts.append(street_type)
-    return ' '.join(parts)
-
-def load_blacklist(county):
-    blacklist_path = f"master_lists/{county}/blacklist.json"
-    if os.path.exists(blacklist_path):
-        with open(blacklist_path, 'r') as f:
-            data = json.load(f)
-            if isinstance(data, list) and data and isinstance(data[0], str):
-                # Migrate old format: list of strings to list of dicts
-                return [{'account': acc, 'applicant_address': '', 'norm_addr': ''} for acc in data]
-            else:
-                return data
-    return []
-
-def save_blacklist(county, blacklist_list):
-    blacklist_path = f"master_lists/{county}/blacklist.json"
-    os.makedirs(os.path.dirname(blacklist_path), exist_ok=True)
-    with open(blacklist_path, 'w') as f:
-        json.dump(blacklist_list, f)
-
-def normalize_address(addr):
-    if not addr:
-        return ''
-    addr = addr.lower().strip()
-    # Common replacements: full to abbr
-    replacements = {
-        r'\bstreet\b': 'st',
-        r'\bavenue\b': 'ave',
-        r'\boulevard\b': 'blvd',
-        r'\bdrive\b': 'dr',
-        r'\broad\b': 'rd',
-        r'\bcircle\b': 'cir',
-        r'\bcourt\b': 'ct',
-        r'\blane\b': 'ln',
-        r'\bplace\b': 'pl',
-        r'\balley\b': 'aly',
-        r'\bcenter\b': 'ctr',
-        r'\bhighway\b': 'hwy',
-        # Add more as needed
-    }
-    for full, abbr in replacements.items():
-        addr = re.sub(full, abbr, addr)
-    # Remove extra spaces
-    addr = re.sub(r'\s+', ' ', addr).strip()
-    return addr
-
-def compare_excels(df1_bytes, df2_path, blacklist_list):
-    blacklist_accounts = {d['account'] for d in blacklist_list if isinstance(d, dict) and 'account' in d}
-    try:
-        df1_orig = pd.read_excel(io.BytesIO(df1_bytes), engine='openpyxl')
-        df2_orig = pd.read_excel(df2_path, engine='openpyxl')
-
-        if df1_orig.empty or df2_orig.empty:
-            return None, "One or both files are empty."
-
-        key_col1 = find_account_col(df1_orig)
-        key_col2 = find_account_col(df2_orig)
-        if not key_col1 or not key_col2:
-            return None, "Could not identify account number column (M/R + 7 digits) in one or both files."
-
-        name_col1 = find_name_col(df1_orig)
-        phone_col1 = find_phone_col(df1_orig)
-        filer_address_col1 = next((col for col in df1_orig.columns if 'Filer Address' in col), None)
-
-        if not name_col1:
-            st.warning("Name column not found. Will skip name comparison.")
-        if not phone_col1:
-            st.warning("Phone column not found. Will skip phone comparison.")
-        if not filer_address_col1:
-            st.warning("Filer Address column not found. Will skip filer address.")
-
-        account_pattern = re.compile(r'^[MR]\d{7}$')
-        df1 = df1_orig[df1_orig[key_col1].astype(str).str.match(account_pattern, na=False)].copy()
-        df2 = df2_orig[df2_orig[key_col2].astype(str).str.match(account_pattern, na=False)].copy()
-
-        if df1.empty or df2.empty:
-            return None, "No valid account numbers found in one or both files after filtering."
-
-        df1.set_index(key_col1, inplace=True)
-        df2.set_index(key_col2, inplace=True)
-        common = df1[df1.index.isin(df2.index)]
-        # Filter out blacklisted accounts
-        common = common[~common.index.isin(blacklist_accounts)]
-
-        common_display = []
-        for name, group in common.groupby(level=0):
-            count = len(group)
-            if count > 1:
-                note_row = {
-                    'Account Number': f"*** The below account has {count} entries ***",
-                    'Name': '', 'Address': '', 'Filer Name': '', 'Filer Address': '', 'Filer Phone': ''
-                }
-                common_display.append(note_row)
-            for _, sub_row in group.iterrows():
-                name_f1 = sub_row.get(name_col1, pd.NA) if name_col1 else pd.NA
-                phone_f1 = sub_row.get(phone_col1, pd.NA) if phone_col1 else pd.NA
-                addr_f1 = get_address(sub_row, df1_orig)
-                filer_addr_f1 = sub_row.get(filer_address_col1, pd.NA) if filer_address_col1 else pd.NA
-
-                display_row = {
-                    'Account Number': name,
-                    'Name': str(name_f1) if pd.notna(name_f1) else '',
-                    'Address': addr_f1,
-                    'Filer Name': parse_filer_name(str(name_f1) if pd.notna(name_f1) else ''),
-                    'Filer Address': str(filer_addr_f1) if pd.notna(filer_addr_f1) else '',
-                    'Filer Phone': str(phone_f1) if pd.notna(phone_f1) else ''
-                }
-                common_display.append(display_row)
-
-        common_all = pd.DataFrame(common_display)
-        return common_all, None
-    except Exception as e:
-        return None, f"Failed to compare files: {str(e)}"
-
-def compare_addresses(df1_orig, accounts_path, blacklist_list):
-    blacklist_norms = {d['norm_addr'] for d in blacklist_list if isinstance(d, dict) and 'norm_addr' in d}
-    try:
-        accounts_df = pd.read_excel(accounts_path, engine='openpyxl')
-        if accounts_df.empty:
-            return None, "Accounts file is empty."
-
-        account_col = find_account_col(accounts_df)
-        if not account_col:
-            return None, "Could not identify account number column in accounts file."
-
-        blacklist_accounts = {d['account'] for d in blacklist_list if isinstance(d, dict) and 'account' in d}
-        # Filter for M and R accounts
-        mr_df = accounts_df[accounts_df[account_col].astype(str).str.match(r'^[MR]\d{7}$', na=False)].copy()
-        # Filter out blacklisted accounts
-        mr_df = mr_df[~mr_df[account_col].isin(blacklist_accounts)]
-
-        if mr_df.empty:
-            return pd.DataFrame(), None
-
-        # Normalize applicant addresses
-        applicant_addrs = {}
-        app_account_col = find_account_col(df1_orig)
-        for _, app_row in df1_orig.iterrows():
-            app_account = str(app_row.get(app_account_col, '')) if app_account_col else 'N/A'
-
-            app_predir = str(app_row.get('Predirection', '')) if pd.notna(app_row.get('Predirection', '')) else ""
-            app_stno = str(app_row.get('Street Number', '')) if pd.notna(app_row.get('Street Number', '')) else ""
-            app_stname = str(app_row.get('Street Name', '')) if pd.notna(app_row.get('Street Name', '')) else ""
-            app_sttype = str(app_row.get('Street Type', '')) if pd.notna(app_row.get('Street Type', '')) else ""
-            app_addr_parts = [p.strip() for p in [app_predir, app_stno, app_stname, app_sttype]]
-            app_addr = ' '.join(part for part in app_addr_parts if part)
-            if not app_addr:
-                continue
-            app_addr_norm = normalize_address(app_addr)
-
-            # Skip if address is blacklisted
-            if app_addr_norm in blacklist_norms:
-                continue
-
-            if app_addr_norm:
-                if app_addr_norm not in applicant_addrs:
-                    applicant_addrs[app_addr_norm] = []
-                applicant_addrs[app_addr_norm].append({
-                    'Account': app_account,
-                    'Address': app_addr
-                })
-
-        # Normalize MR addresses
-        mr_addrs = {}
-        for _, mr_row in mr_df.iterrows():
-            mr_account = mr_row[account_col]
-
-            mr_addr = str(mr_row.get('ADDRESS', '')) if pd.notna(mr_row.get('ADDRESS', '')) else ""
-            if not mr_addr:
-                continue
-            mr_addr_norm = normalize_address(mr_addr)
-
-            if mr_addr_norm:
-                if mr_addr_norm not in mr_addrs:
-                    mr_addrs[mr_addr_norm] = []
-                mr_addrs[mr_addr_norm].append({
-                    'Account': mr_account,
-                    'Address': mr_addr
-                })
-
-        # Find matches - unique per applicant address, using first applicant as representative
-        potentials = []
-        for norm_addr, app_list in applicant_addrs.items():
-            if norm_addr in mr_addrs:
-                mr_list = mr_addrs[norm_addr]
-                # Use the first applicant as representative
-                rep_app = app_list[0]
-                for mr in mr_list:
-                    if rep_app['Account'] != mr['Account']:
-                        potentials.append({
-                            'Applicant Account': rep_app['Account'],
-                            'Applicant Address': rep_app['Address'],
-                            'Matching Account': mr['Account'],
-                            'Matching Address': mr['Address']
-                        })
-
-        potentials_df = pd.DataFrame(potentials)
-        if not potentials_df.empty:
-            potentials_df = potentials_df.sort_values(['Applicant Address', 'Matching Account'])
-
-        return potentials_df, None
-    except Exception as e:
-        return None, f"Failed to compare addresses: {str(e)}"
-
-def generate_txt_output(common_all):
-    if common_all is None or common_all.empty:
-        return "No matching accounts found."
-    
-    output = io.StringIO()
-    output.write("ALL MATCHING ACCOUNTS WITH DATA FROM HO APPLICANT FILE\n\n")
-    header_fmt = "{:<15} {:<40} {:<30} {:<40} {:<30} {:<20}\n"
-    output.write(header_fmt.format('Account Number', 'Name', 'Address', 'Filer Name', 'Filer Address', 'Filer Phone #'))
-    sep_fmt = "{:<15} {:<40} {:<30} {:<40} {:<30} {:<20}\n"
-    output.write(sep_fmt.format('-'*15, '-'*40, '-'*30, '-'*40, '-'*30, '-'*20))
-    data_fmt = "{:<15} {:<40} {:<30} {:<40} {:<30} {:<20}\n"
-    for _, row in common_all.iterrows():
-        acc = str(row['Account Number']) if pd.notna(row['Account Number']) else ''
-        name = str(row['Name']) if pd.notna(row['Name']) else ''
-        addr = str(row['Address']) if pd.notna(row['Address']) else ''
-        filer_name = str(row['Filer Name']) if pd.notna(row['Filer Name']) else ''
-        filer_addr = str(row['Filer Address']) if pd.notna(row['Filer Address']) else ''
-        filer_phone = str(row['Filer Phone']) if pd.notna(row['Filer Phone']) else ''
-        output.write(data_fmt.format(acc, name, addr, filer_name, filer_addr, filer_phone))
-    return output.getvalue()
-
-def get_master_path(county):
-    return f"master_lists/{county}/master.xlsx"
-
-def get_accounts_path(county):
-    return f"master_lists/{county}/accounts.xlsx"
-
-def get_file_status(file_path):
-    if os.path.exists(file_path):
-        size_mb = os.path.getsize(file_path) / (1024 * 1024)  # MB
+# Status line from the county manifest (no filesystem access)
+def get_file_status(manifest, file_path):
+    entry = get_file_entry(manifest, os.path.basename(file_path))
+    if entry:
+        size_mb = entry['size'] / (1024 * 1024)  # MB
         return f"✅ Exists ({size_mb:.1f} MB): {os.path.basename(file_path)}"
-    return f"❌ Missing"
-
-# User preference functions (server-side persistence)
-def get_user_prefs_path():
-    username = os.environ.get('REMOTE_USER', 'anonymous').strip().replace(' ', '_')
-    prefs_dir = 'user_prefs'
-    os.makedirs(prefs_dir, exist_ok=True)
-    return os.path.join(prefs_dir, f"{username}_prefs.json")
-
-def load_user_pref(key: str, default=None):
-    prefs_path = get_user_prefs_path()
-    if os.path.exists(prefs_path):
-        with open(prefs_path, 'r') as f:
-            prefs = json.load(f)
-            return prefs.get(key, default)
-    return default
-
-def save_user_pref(key: str, value):
-    prefs_path = get_user_prefs_path()
-    prefs = {}
-    if os.path.exists(prefs_path):
-        with open(prefs_path, 'r') as f:
-            prefs = json.load(f)
-    prefs[key] = value
-    with open(prefs_path, 'w') as f:
-        json.dump(prefs, f)
+    return "❌ Missing"
+
+set_context(app='ltho', county=county)
 
 # Auto-set session state for county
 if 'last_county' not in st.session_state:
     st.session_state.last_county = county
-save_user_pref('last_county', county)  # Persist for fallback
+if 'prefs_token' not in st.session_state:
+    st.session_state.prefs_token = session_token()  # Flushes prefs when the session ends
+save_user_pref('last_county', county)  # Persist for fallback (written only when it changes)
 
 # Back to Home button (to subdomain index.html)
 st.markdown(
@@ -418,19 +90,250 @@ if 'applicant_bytes' not in st.session_state:
     st.session_state.applicant_bytes = None
 if 'comparison_results' not in st.session_state:
     st.session_state.comparison_results = None
+if 'results_version' not in st.session_state:
+    st.session_state.results_version = 0  # Bumped whenever comparison results change
+if 'report_cache' not in st.session_state:
+    st.session_state.report_cache = {}
+if 'blacklist_version' not in st.session_state:
+    st.session_state.blacklist_version = 0  # Bumped whenever the session blacklist changes
+if 'view_cache' not in st.session_state:
+    st.session_state.view_cache = {}
+if 'table_selections' not in st.session_state:
+    st.session_state.table_selections = {}
+if 'applicant_file_id' not in st.session_state:
+    st.session_state.applicant_file_id = None
+if 'applicant_frame' not in st.session_state:
+    st.session_state.applicant_frame = None  # (applicant_file_id, parsed applicant DataFrame)
+st.session_state.render_timings = {}
 if 'mr_potentials' not in st.session_state:
     st.session_state.mr_potentials = pd.DataFrame()
 if 'blacklist' not in st.session_state:
     st.session_state.blacklist = load_blacklist(county)
-if 'master_uploaded' not in st.session_state:
-    st.session_state.master_uploaded = os.path.exists(get_master_path(county))
-if 'accounts_uploaded' not in st.session_state:
-    st.session_state.accounts_uploaded = os.path.exists(get_accounts_path(county))
 if 'clear_password' not in st.session_state:
     st.session_state.clear_password = ""
+if 'compare_job' not in st.session_state:
+    st.session_state.compare_job = None  # Running CompareJob started by the Compare button
+if 'compare_messages' not in st.session_state:
+    st.session_state.compare_messages = []  # (level, text) from the last finished compare
+if 'compare_memory' not in st.session_state:
+    st.session_state.compare_memory = []  # Loaded frame sizes from the last compare (see memory_rows)
 
 master_path = get_master_path(county)
 accounts_path = get_accounts_path(county)
+master_lists_dir = os.path.dirname(master_path)
+result_cache = get_result_cache(county)  # Stage results of earlier compares (see result_cache.py)
+
+# One manifest watcher per process and county directory (MANIFEST_WATCH=1, needs watchdog)
+@st.cache_resource(show_spinner=False)
+def watch_county_dir(county_dir):
+    return start_watcher(county_dir)
+
+# File status comes from the county manifest, held in memory between reruns
+if WATCH_ENABLED:
+    watch_county_dir(master_lists_dir)
+manifest = get_manifest(master_lists_dir)
+if 'master_uploaded' not in st.session_state:
+    st.session_state.master_uploaded = has_file(manifest, os.path.basename(master_path))
+if 'accounts_uploaded' not in st.session_state:
+    st.session_state.accounts_uploaded = has_file(manifest, os.path.basename(accounts_path))
+
+# Store comparison results; a stage that failed keeps its previous results
+def store_comparison(common_all, error, mr_potentials, mr_error):
+    if not error:
+        st.session_state.comparison_results = common_all
+    if not mr_error:
+        st.session_state.mr_potentials = mr_potentials
+    st.session_state.results_version += 1
+    COMPARES.inc(county=county, status='error' if error or mr_error else 'ok')
+
+# Rows and in-memory size of each input a compare loaded, from its progress reports
+MEMORY_INPUTS = {'applicant': 'Applicant list', 'matches': 'Master list', 'potentials': 'Accounts list'}
+
+def memory_rows(progress):
+    return [
+        {'Input': label, 'Rows': progress[stage].get('rows', 0), 'MB': round(progress[stage]['memory'] / 1e6, 2)}
+        for stage, label in MEMORY_INPUTS.items() if 'memory' in progress.get(stage, {})
+    ]
+
+# Re-run both comparisons for the loaded applicant file and store the results
+def run_comparison():
+    progress = {}
+    with COMPARE_SECONDS.time(county=county):
+        common_all, error, mr_potentials, mr_error = run_comparisons(
+            st.session_state.applicant_bytes, master_path, accounts_path,
+            st.session_state.blacklist, warn=st.warning, cache=result_cache,
+            progress=lambda stage, **fields: progress.setdefault(stage, {}).update(fields),
+            on_applicant=keep_applicant_frame,
+        )
+    st.session_state.compare_memory = memory_rows(progress)
+    store_comparison(common_all, error, mr_potentials, mr_error)
+
+# Start the Compare button's comparison in the background (see compare_jobs.py)
+def start_compare_job():
+    if st.session_state.compare_job is not None:
+        st.session_state.compare_job.cancel()
+    st.session_state.compare_messages = []
+    st.session_state.compare_job = CompareJob(
+        st.session_state.applicant_bytes, master_path, accounts_path,
+        st.session_state.blacklist, context=get_context(), cache=result_cache,
+    )
+
+# Collect a finished job's results and messages
+def finish_compare_job(job):
+    st.session_state.compare_job = None
+    try:
+        common_all, error, mr_potentials, mr_error = job.result()
+    except CompareCancelled:
+        COMPARES.inc(county=county, status='cancelled')
+        st.session_state.compare_messages = [('info', "Compare cancelled.")]
+        return
+    COMPARE_SECONDS.observe(job.elapsed, county=county)
+    if job.applicant_frame is not None:
+        keep_applicant_frame(job.applicant_frame)
+    st.session_state.compare_memory = memory_rows(job.progress())
+    store_comparison(common_all, error, mr_potentials, mr_error)
+    st.session_state.compare_messages = (
+        [('warning', w) for w in job.warnings] + [('error', e) for e in dict.fromkeys((error, mr_error)) if e]
+    )
+
+def describe_progress(progress):
+    applicant, matches, potentials = progress['applicant'], progress['matches'], progress['potentials']
+    if applicant.get('cached'):
+        lines = ["Applicant file: compared before with these lists and blacklist"]
+    else:
+        lines = [f"Applicant file: {applicant['rows']:,} rows parsed" if 'rows' in applicant else "Applicant file: reading..."]
+    if matches.get('cached'):
+        lines.append(f"Master list: unchanged since the last compare, {matches.get('matches', 0):,} matches loaded ✓")
+    elif 'rows' in matches:
+        lines.append(f"Master list: {matches['rows']:,} rows parsed, {matches.get('matches', 0):,} matches found"
+                     + (" ✓" if matches['done'] else "..."))
+    if potentials.get('cached'):
+        lines.append(f"Accounts list: unchanged since the last compare, {potentials.get('potentials', 0):,} potential M/R matches loaded ✓")
+    elif 'rows' in potentials:
+        lines.append(f"Accounts list: {potentials['rows']:,} rows parsed, {potentials.get('addresses', 0):,} addresses checked"
+                     + (f", {potentials['potentials']:,} potential M/R matches ✓" if potentials['done'] else "..."))
+    return lines
+
+# The loaded applicant file as a DataFrame, parsed once per upload; a compare that had to read
+# the file hands its frame over (on_applicant), so it isn't parsed twice
+def keep_applicant_frame(df):
+    st.session_state.applicant_frame = (st.session_state.applicant_file_id, df)
+
+def get_applicant_frame():
+    stored = st.session_state.applicant_frame
+    if stored is None or stored[0] != st.session_state.applicant_file_id:
+        keep_applicant_frame(read_applicant(st.session_state.applicant_bytes))
+    return st.session_state.applicant_frame[1]
+
+# Applications sharing a filer phone or address across accounts (households.py), once per
+# applicant file
+def build_households_view():
+    with st.spinner("Grouping shared phones and filer addresses..."):
+        return find_households(get_applicant_frame())
+
+# Export bytes for the current results, built once per results version
+def report_ready(fmt):
+    return (st.session_state.results_version, fmt) in st.session_state.report_cache
+
+def get_report(fmt):
+    key = (st.session_state.results_version, fmt)
+    cache = st.session_state.report_cache
+    record_cache('report', key in cache, county=county)
+    if key not in cache:
+        for old_key in [k for k in cache if k[0] != key[0]]:
+            del cache[old_key]
+        if fmt == 'txt':
+            cache[key] = txt_report_bytes(st.session_state.comparison_results)
+        elif fmt == 'csv':
+            cache[key] = csv_report_bytes(st.session_state.comparison_results)
+        elif fmt == 'xlsx':
+            cache[key] = xlsx_report_bytes(st.session_state.comparison_results, st.session_state.mr_potentials)
+    return cache[key]
+
+# Derived frames cached in session state by name and version, rebuilt only when the version
+# changes. Callers must not modify the returned frame (st.data_editor returns a copy).
+def memoized_view(name, version, build):
+    cached = st.session_state.view_cache.get(name)
+    record_cache('view', cached is not None and cached[0] == version, county=county)
+    if cached is None or cached[0] != version:
+        cached = st.session_state.view_cache[name] = (version, build())
+    return cached[1]
+
+# Display frame plus the entry keys; row i of the frame is the entry with key keys[i]
+def build_blacklist_view():
+    blacklist_keys = st.session_state.blacklist.keys()
+    blacklist_df = pd.DataFrame(list(st.session_state.blacklist), columns=BLACKLIST_COLUMNS)
+    blacklist_display_df = blacklist_df[['applicant_account', 'account', 'applicant_address']].copy()
+    blacklist_display_df.columns = ['Applicant Account', 'Matching Account', 'Address']
+    return blacklist_display_df, blacklist_keys
+
+# Filter widgets for a result table. Returns the filters as a tuple (usable as part of a
+# memoized view's version) and the page size.
+def table_filters(name, duplicates_label):
+    col1, col2, col3, col4 = st.columns([2, 3, 2, 1])
+    with col1:
+        account_prefix = st.text_input("Account starts with", key=f"{name}_account_prefix")
+    with col2:
+        address_contains = st.text_input("Address contains", key=f"{name}_address_contains")
+    with col3:
+        duplicates_only = st.checkbox(duplicates_label, key=f"{name}_duplicates_only")
+    with col4:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, key=f"{name}_page_size")
+    return (account_prefix, address_contains, duplicates_only), page_size
+
+def table_pager(name, total_rows, page_size, caption=None):
+    pages = page_count(total_rows, page_size)
+    if st.session_state.get(f"{name}_page", 1) > pages:
+        st.session_state[f"{name}_page"] = pages
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1, key=f"{name}_page")
+    st.caption(caption or f"{total_rows} matching rows")
+    return page
+
+# Checkbox selections (row index labels) that persist across pages and filters; cleared when
+# the table's version changes
+def get_selection(name, version):
+    selections = st.session_state.table_selections
+    if name not in selections or selections[name][0] != version:
+        selections[name] = (version, set())
+    return selections[name][1]
+
+# Editable page of a table with a Select column backed by the cross-page selection
+def selectable_page(page_df, selection, select_label, select_help, editor_key):
+    page_df = page_df.copy()
+    page_df['Select'] = page_df.index.isin(selection)
+    edited_df = st.data_editor(
+        page_df,
+        column_config={
+            "Select": st.column_config.CheckboxColumn(
+                select_label,
+                help=select_help,
+                default=False,
+            )
+        },
+        disabled=[col for col in page_df.columns if col != 'Select'],
+        use_container_width=True,
+        hide_index=False,
+        key=editor_key,
+    )
+    for label, checked in edited_df['Select'].items():
+        if checked:
+            selection.add(label)
+        else:
+            selection.discard(label)
+    st.caption(f"{len(selection)} selected across all pages")
+
+def set_blacklist(blacklist):
+    st.session_state.blacklist = blacklist
+    st.session_state.blacklist_version += 1
+
+# Records how long a page section took to render, for the debug timing overlay
+@contextmanager
+def render_section(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        st.session_state.render_timings[name] = (time.perf_counter() - start) * 1000
 
 # Sidebar with county display
 with st.sidebar:
@@ -442,164 +345,217 @@ tab1, tab2 = st.tabs(["Compare", "Settings"])
 with tab1:
     st.subheader("Upload Applicant List and Compare")
     
-    uploaded_applicant = st.file_uploader("Upload HO Applicant Excel", type=['xlsx', 'xls'])
+    uploaded_applicant = st.file_uploader("Upload HO Applicant Excel", type=['xlsx', 'xlsb', 'xls', 'csv'])
     if uploaded_applicant is not None:
-        st.session_state.applicant_bytes = uploaded_applicant.getvalue()
+        # Copy the upload only when a new file is chosen, not on every rerun
+        if uploaded_applicant.file_id != st.session_state.applicant_file_id:
+            st.session_state.applicant_bytes = uploaded_applicant.getvalue()
+            st.session_state.applicant_file_id = uploaded_applicant.file_id
         st.success("Applicant file loaded!")
     
-    if st.button("Compare") and st.session_state.applicant_bytes:
-        with st.spinner("Comparing..."):
-            common_all, error = compare_excels(st.session_state.applicant_bytes, master_path, st.session_state.blacklist)
-            if error:
-                st.error(error)
-            else:
-                st.session_state.comparison_results = common_all
-            
-            df1_orig = pd.read_excel(io.BytesIO(st.session_state.applicant_bytes), engine='openpyxl')
-            mr_potentials, mr_error = compare_addresses(df1_orig, accounts_path, st.session_state.blacklist)
-            if mr_error:
-                st.error(mr_error)
-            else:
-                st.session_state.mr_potentials = mr_potentials
-        
+    comparing = st.session_state.compare_job is not None
+    if st.button("Compare", disabled=comparing) and st.session_state.applicant_bytes:
+        start_compare_job()
         st.rerun()
+
+    # Polls the running compare without re-running the whole page; the full rerun happens once,
+    # when the results are in
+    @st.fragment(run_every=0.5 if comparing else None)
+    def compare_progress():
+        job = st.session_state.compare_job
+        if job is None:
+            return
+        if job.done:
+            finish_compare_job(job)
+            st.rerun()
+        status = "Cancelling..." if job.cancelled else f"Comparing... ({job.elapsed:.0f}s)"
+        with st.status(status, expanded=True):
+            for line in describe_progress(job.progress()):
+                st.write(line)
+        if st.button("Cancel Compare", disabled=job.cancelled):
+            job.cancel()
+
+    compare_progress()
+    for level, message in st.session_state.compare_messages:
+        getattr(st, level)(message)
     
-    if st.session_state.comparison_results is not None:
-        df = st.session_state.comparison_results
-        st.dataframe(df, use_container_width=True)
+    with render_section("Results table"):
+        if st.session_state.comparison_results is not None:
+            filters, page_size = table_filters('results', "Duplicate accounts only")
+            # Name Similarity: applicant name vs. master list owner (see names.py)
+            least_similar_first = 'Name Similarity' in st.session_state.comparison_results.columns and st.checkbox(
+                "Least similar owner names first", key="results_least_similar_first",
+                help="Accounts whose applicant name differs most from the owner on the master list come first",
+            )
+            def build_results_view():
+                view = filter_frame(
+                    st.session_state.comparison_results, ['Account Number'], ['Address', 'Filer Address'],
+                    *filters, duplicate_col='Account Number',
+                )
+                return sort_by_group(view, 'Account Number', 'Name Similarity') if least_similar_first else view
+            results_view = memoized_view(
+                'results', (st.session_state.results_version, filters, least_similar_first), build_results_view,
+            )
+            page = table_pager('results', len(results_view), page_size)
+            st.dataframe(get_page(results_view, page, page_size), use_container_width=True)
         
-        # Download TXT
-        txt_output = generate_txt_output(df)
-        st.download_button(
-            label="Download as TXT",
-            data=txt_output,
-            file_name=f"{county}_comparison.txt",
-            mime="text/plain"
-        )
+            # Downloads (cached per results version, so reruns don't rebuild them). The formatted
+            # Excel report takes seconds on large results, so it is only built on request.
+            dl1, dl2, dl3 = st.columns(3)
+            with dl1:
+                st.download_button(
+                    label="Download as TXT",
+                    data=get_report('txt'),
+                    file_name=f"{county}_comparison.txt",
+                    mime="text/plain"
+                )
+            with dl2:
+                st.download_button(
+                    label="Download as CSV",
+                    data=get_report('csv'),
+                    file_name=f"{county}_comparison.csv",
+                    mime="text/csv"
+                )
+            with dl3:
+                if report_ready('xlsx'):
+                    st.download_button(
+                        label="Download as Excel",
+                        data=get_report('xlsx'),
+                        file_name=f"{county}_comparison.xlsx",
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                    )
+                elif st.button("Prepare Excel report", help="Build the formatted Excel report for download"):
+                    with st.spinner("Building Excel report..."):
+                        get_report('xlsx')
+                    st.rerun()
     
     # Potential M/R Matches
-    with st.expander("Potential M/R Address Matches", expanded=True):
-        if not st.session_state.mr_potentials.empty:
-            potentials_df = st.session_state.mr_potentials.copy()
-            potentials_df['Select'] = False
-            edited_df = st.data_editor(
-                potentials_df,
-                column_config={
-                    "Select": st.column_config.CheckboxColumn(
-                        "Select to Blacklist",
-                        help="Check to add this matching account to blacklist",
-                        default=False,
-                    )
-                },
-                use_container_width=True,
-                hide_index=False,
-            )
-            
-            if st.button("Add Selected to Blacklist"):
-                selected_rows = edited_df[edited_df['Select'] == True]
-                selected_to_blacklist = []
-                for _, row in selected_rows.iterrows():
-                    app_addr_norm = normalize_address(row['Applicant Address'])
-                    selected_to_blacklist.append({
-                        'applicant_account': row['Applicant Account'],
-                        'account': row['Matching Account'],
-                        'applicant_address': row['Applicant Address'],
-                        'norm_addr': app_addr_norm
-                    })
-                if selected_to_blacklist:
-                    st.session_state.blacklist.extend(selected_to_blacklist)
-                    save_blacklist(county, st.session_state.blacklist)
-                    
-                    # Re-run comparisons with updated blacklist
-                    common_all, error = compare_excels(st.session_state.applicant_bytes, master_path, st.session_state.blacklist)
-                    if not error:
-                        st.session_state.comparison_results = common_all
+    with render_section("Potential M/R matches"):
+        with st.expander("Potential M/R Address Matches", expanded=True):
+            if not st.session_state.mr_potentials.empty:
+                filters, page_size = table_filters('potentials', "Shared applicant address only")
+                potentials_view = memoized_view(
+                    'potentials', (st.session_state.results_version, filters),
+                    lambda: filter_frame(
+                        st.session_state.mr_potentials, ['Applicant Account', 'Matching Account'],
+                        ['Applicant Address', 'Matching Address'], *filters, duplicate_col='Applicant Address',
+                    ),
+                )
+                # One box per cluster (compare_engine/clusters.py) that opens to list its members
+                # (expanders can't nest in this expander); pages hold page_size clusters, and a
+                # cluster larger than a page pages its own rows
+                cluster_ids = potentials_view['Cluster'].unique()
+                page = table_pager('potentials', len(cluster_ids), page_size,
+                                   caption=f"{len(potentials_view)} matching rows in {len(cluster_ids)} clusters")
+                potentials_selection = get_selection('potentials', st.session_state.results_version)
+                page_clusters = get_page(pd.Series(cluster_ids), page, page_size).tolist()
+                for cluster_id, members in potentials_view[potentials_view['Cluster'].isin(page_clusters)].groupby('Cluster', sort=False):
+                    applicant_accounts = members['Applicant Account'].nunique()
+                    matching_accounts = members['Matching Account'].nunique()
+                    with st.container(border=True):
+                        show_members = st.checkbox(
+                            f"Cluster {cluster_id}: {members['Applicant Address'].iloc[0]} - "
+                            f"{applicant_accounts} applicant(s), {matching_accounts} M/R account(s)",
+                            key=f"potentials_cluster_{cluster_id}",
+                        )
+                        if show_members:
+                            member_page = 1
+                            if len(members) > page_size:
+                                member_page = table_pager(f"potentials_cluster_{cluster_id}", len(members), page_size)
+                            selectable_page(
+                                get_page(members.drop(columns=['Cluster']), member_page, page_size), potentials_selection,
+                                "Select to Blacklist", "Check to add this member's matching account to blacklist",
+                                editor_key=f"potentials_editor_{st.session_state.results_version}_{filters}_{cluster_id}_{page_size}_{member_page}",
+                            )
+
+                # Per member: only the selected matching accounts are ignored from now on. Per
+                # address: the applicant address is ignored as well, so no account matches it again.
+                col1, col2 = st.columns(2)
+                blacklist_accounts_only = col1.button("Blacklist Selected Accounts",
+                                                      help="Ignore the selected matching accounts; other members stay")
+                blacklist_addresses = col2.button("Blacklist Selected Addresses",
+                                                  help="Ignore the selected matching accounts and their applicant addresses")
+                if blacklist_accounts_only or blacklist_addresses:
+                    selected_rows = st.session_state.mr_potentials.loc[sorted(potentials_selection)]
+                    selected_to_blacklist = []
+                    for _, row in selected_rows.iterrows():
+                        app_addr_norm = normalize_address(row['Applicant Address']) if blacklist_addresses else ''
+                        selected_to_blacklist.append({
+                            'applicant_account': row['Applicant Account'],
+                            'account': row['Matching Account'],
+                            'applicant_address': row['Applicant Address'],
+                            'norm_addr': app_addr_norm
+                        })
+                    if selected_to_blacklist:
+                        set_blacklist(add_to_blacklist(county, selected_to_blacklist))
                     
-                    df1_orig = pd.read_excel(io.BytesIO(st.session_state.applicant_bytes), engine='openpyxl')
-                    mr_potentials, mr_error = compare_addresses(df1_orig, accounts_path, st.session_state.blacklist)
-                    if not mr_error:
-                        st.session_state.mr_potentials = mr_potentials
+                        # Re-run comparisons with updated blacklist
+                        run_comparison()
                     
-                    st.success(f"Added {len(selected_to_blacklist)} accounts to blacklist. Results updated.")
-                    st.rerun()
+                        st.success(f"Added {len(selected_to_blacklist)} accounts to blacklist. Results updated.")
+                        st.rerun()
+                    else:
+                        st.warning("No accounts selected.")
+            else:
+                st.info("No potential M/R address matches found.")
+
+    # Households: several accounts filed for with one phone number or mailing address
+    with render_section("Shared phone / filer address"):
+        if st.session_state.comparison_results is not None and st.session_state.applicant_bytes:
+            with st.expander("Shared Phone / Filer Address", expanded=False):
+                households = memoized_view('households', st.session_state.applicant_file_id, build_households_view)
+                if households.empty:
+                    st.info("No phone number or filer address is shared by applications for different accounts.")
                 else:
-                    st.warning("No accounts selected.")
-        else:
-            st.info("No potential M/R address matches found.")
+                    st.caption(f"{len(households)} phone numbers / filer addresses used for more than one account")
+                    st.dataframe(households, use_container_width=True, hide_index=True)
+                    st.download_button("Download as CSV", data=csv_report_bytes(households),
+                                       file_name=f"{county}_shared_contacts.csv", mime="text/csv")
 
     # Blacklist Management
-    with st.expander("Blacklist Management", expanded=False):
-        st.write(f"Current Blacklist ({len(st.session_state.blacklist)} entries):")
-        if st.session_state.blacklist:
-            blacklist_df = pd.DataFrame(st.session_state.blacklist)
-            if 'applicant_account' in blacklist_df.columns:
-                blacklist_display_df = blacklist_df[['applicant_account', 'account', 'applicant_address']].copy()
-                blacklist_display_df.columns = ['Applicant Account', 'Matching Account', 'Address']
-            else:
-                # Fallback for old format
-                blacklist_display_df = pd.DataFrame({
-                    'Applicant Account': [''] * len(blacklist_df),
-                    'Matching Account': blacklist_df['account'],
-                    'Address': blacklist_df['applicant_address']
-                })
-            blacklist_display_df['Select'] = False
-            edited_blacklist = st.data_editor(
-                blacklist_display_df,
-                column_config={
-                    "Select": st.column_config.CheckboxColumn(
-                        "Select to Remove",
-                        help="Check to remove this entry from blacklist",
-                        default=False,
-                    )
-                },
-                use_container_width=True,
-                hide_index=False,
-            )
+    with render_section("Blacklist management"):
+        with st.expander("Blacklist Management", expanded=False):
+            st.write(f"Current Blacklist ({len(st.session_state.blacklist)} entries):")
+            if st.session_state.blacklist:
+                blacklist_display_df, blacklist_keys = memoized_view(
+                    'blacklist', st.session_state.blacklist_version, build_blacklist_view
+                )
+                filters, page_size = table_filters('blacklist', "Repeated matching accounts only")
+                blacklist_view = memoized_view(
+                    'blacklist_filtered', (st.session_state.blacklist_version, filters),
+                    lambda: filter_frame(
+                        blacklist_display_df, ['Applicant Account', 'Matching Account'], ['Address'],
+                        *filters, duplicate_col='Matching Account',
+                    ),
+                )
+                page = table_pager('blacklist', len(blacklist_view), page_size)
+                blacklist_selection = get_selection('blacklist', st.session_state.blacklist_version)
+                selectable_page(
+                    get_page(blacklist_view, page, page_size), blacklist_selection,
+                    "Select to Remove", "Check to remove this entry from blacklist",
+                    editor_key=f"blacklist_editor_{st.session_state.blacklist_version}_{filters}_{page_size}_{page}",
+                )
             
-            if st.button("Remove Selected from Blacklist"):
-                selected_rows = edited_blacklist[edited_blacklist['Select'] == True]
-                if not selected_rows.empty:
-                    indices_to_remove = []
-                    for _, row in selected_rows.iterrows():
-                        for idx, entry in enumerate(st.session_state.blacklist):
-                            match_acc = entry.get('account') == row['Matching Account']
-                            match_addr = entry.get('applicant_address') == row['Address']
-                            if 'applicant_account' in entry:
-                                match_app = entry.get('applicant_account') == row['Applicant Account']
-                                if match_acc and match_addr and match_app:
-                                    indices_to_remove.append(idx)
-                                    break
-                            else:
-                                if match_acc and match_addr:
-                                    indices_to_remove.append(idx)
-                                    break
-                    # Remove in reverse order
-                    for i in sorted(indices_to_remove, reverse=True):
-                        del st.session_state.blacklist[i]
-                    save_blacklist(county, st.session_state.blacklist)
+                if st.button("Remove Selected from Blacklist"):
+                    if blacklist_selection:
+                        keys_to_remove = [blacklist_keys[i] for i in sorted(blacklist_selection)]
+                        set_blacklist(remove_from_blacklist(county, keys_to_remove))
                     
-                    # Re-run comparisons with updated blacklist
-                    if st.session_state.applicant_bytes:
-                        common_all, error = compare_excels(st.session_state.applicant_bytes, master_path, st.session_state.blacklist)
-                        if not error:
-                            st.session_state.comparison_results = common_all
-                        
-                        df1_orig = pd.read_excel(io.BytesIO(st.session_state.applicant_bytes), engine='openpyxl')
-                        mr_potentials, mr_error = compare_addresses(df1_orig, accounts_path, st.session_state.blacklist)
-                        if not mr_error:
-                            st.session_state.mr_potentials = mr_potentials
+                        # Re-run comparisons with updated blacklist
+                        if st.session_state.applicant_bytes:
+                            run_comparison()
                     
-                    st.success(f"Removed {len(indices_to_remove)} entries from blacklist. Results updated.")
-                    st.rerun()
-                else:
-                    st.warning("No entries selected.")
-        else:
-            st.info("Blacklist is empty.")
+                        st.success(f"Removed {len(keys_to_remove)} entries from blacklist. Results updated.")
+                        st.rerun()
+                    else:
+                        st.warning("No entries selected.")
+            else:
+                st.info("Blacklist is empty.")
 
-    if not os.path.exists(master_path) or not os.path.exists(accounts_path):
+    if not has_file(manifest, os.path.basename(master_path)) or not has_file(manifest, os.path.basename(accounts_path)):
         st.warning("Please upload master and accounts lists in Settings tab to proceed.")
 
-with tab2:
+with tab2, render_section("Settings"):
     st.subheader("Settings: Upload Persistent Files")
     with st.expander("Upload or Manage Files", expanded=True):
         col1, col2 = st.columns(2)
@@ -608,25 +564,23 @@ with tab2:
             st.write(f"**LTHO Master List**")
             
             # Master Status and Replace
-            master_status = get_file_status(master_path)
+            master_status = get_file_status(manifest, master_path)
             st.write(f"**Status:** {master_status}")
-            uploaded_master = st.file_uploader("Replace Master List", type=['xlsx', 'xls'], key="master_upload")
+            uploaded_master = st.file_uploader("Replace Master List", type=['xlsx', 'xlsb', 'xls', 'csv'], key="master_upload")
             if uploaded_master is not None and st.button("Save Master List to Server", type="primary", key="save_master"):
                 try:
                     with st.spinner("Saving master list..."):
-                        df = pd.read_excel(uploaded_master, engine='openpyxl')
-                        df.to_excel(master_path, index=False, engine='openpyxl')
+                        # Raw workbook is stored as-is; only a streaming scan validates it
+                        save_error = save_upload(uploaded_master, master_path, validate=validate_account_workbook)
+                    if save_error:
+                        st.error(f"Failed to save: {save_error}")
+                        st.stop()
+                    record_file(master_lists_dir, os.path.basename(master_path))
                     st.success(f"Master list saved for {county} County!")
                     st.session_state.master_uploaded = True
                     # Re-run comparison if applicant loaded
                     if st.session_state.applicant_bytes:
-                        common_all, error = compare_excels(st.session_state.applicant_bytes, master_path, st.session_state.blacklist)
-                        if not error:
-                            st.session_state.comparison_results = common_all
-                        df1_orig = pd.read_excel(io.BytesIO(st.session_state.applicant_bytes), engine='openpyxl')
-                        mr_potentials, mr_error = compare_addresses(df1_orig, accounts_path, st.session_state.blacklist)
-                        if not mr_error:
-                            st.session_state.mr_potentials = mr_potentials
+                        run_comparison()
                     st.rerun()
                 except Exception as e:
                     st.error(f"Failed to save: {str(e)}")
@@ -634,38 +588,30 @@ with tab2:
             if st.button("Refresh Comparison (Reload Master)", type="secondary", key="refresh_master"):
                 if st.session_state.applicant_bytes:
                     # Re-run comparison if applicant loaded
-                    common_all, error = compare_excels(st.session_state.applicant_bytes, master_path, st.session_state.blacklist)
-                    if not error:
-                        st.session_state.comparison_results = common_all
-                    df1_orig = pd.read_excel(io.BytesIO(st.session_state.applicant_bytes), engine='openpyxl')
-                    mr_potentials, mr_error = compare_addresses(df1_orig, accounts_path, st.session_state.blacklist)
-                    if not mr_error:
-                        st.session_state.mr_potentials = mr_potentials
+                    run_comparison()
                 st.rerun()
         
         with col2:
             st.write(f"**Master Accounts List**")
             
             # Accounts Status and Replace
-            accounts_status = get_file_status(accounts_path)
+            accounts_status = get_file_status(manifest, accounts_path)
             st.write(f"**Status:** {accounts_status}")
-            uploaded_accounts = st.file_uploader("Replace Accounts List", type=['xlsx', 'xls'], key="accounts_upload")
+            uploaded_accounts = st.file_uploader("Replace Accounts List", type=['xlsx', 'xlsb', 'xls', 'csv'], key="accounts_upload")
             if uploaded_accounts is not None and st.button("Save Accounts List to Server", type="primary", key="save_accounts"):
                 try:
                     with st.spinner("Saving accounts list..."):
-                        df = pd.read_excel(uploaded_accounts, engine='openpyxl')
-                        df.to_excel(accounts_path, index=False, engine='openpyxl')
+                        # Raw workbook is stored as-is; only a streaming scan validates it
+                        save_error = save_upload(uploaded_accounts, accounts_path, validate=validate_account_workbook)
+                    if save_error:
+                        st.error(f"Failed to save: {save_error}")
+                        st.stop()
+                    record_file(master_lists_dir, os.path.basename(accounts_path))
                     st.success(f"Accounts list saved for {county} County!")
                     st.session_state.accounts_uploaded = True
                     # Re-run comparison if applicant loaded
                     if st.session_state.applicant_bytes:
-                        common_all, error = compare_excels(st.session_state.applicant_bytes, master_path, st.session_state.blacklist)
-                        if not error:
-                            st.session_state.comparison_results = common_all
-                        df1_orig = pd.read_excel(io.BytesIO(st.session_state.applicant_bytes), engine='openpyxl')
-                        mr_potentials, mr_error = compare_addresses(df1_orig, accounts_path, st.session_state.blacklist)
-                        if not mr_error:
-                            st.session_state.mr_potentials = mr_potentials
+                        run_comparison()
                     st.rerun()
                 except Exception as e:
                     st.error(f"Failed to save: {str(e)}")
@@ -673,22 +619,16 @@ with tab2:
             if st.button("Refresh Comparison (Reload Accounts)", type="secondary", key="refresh_accounts"):
                 if st.session_state.applicant_bytes:
                     # Re-run comparison if applicant loaded
-                    common_all, error = compare_excels(st.session_state.applicant_bytes, master_path, st.session_state.blacklist)
-                    if not error:
-                        st.session_state.comparison_results = common_all
-                    df1_orig = pd.read_excel(io.BytesIO(st.session_state.applicant_bytes), engine='openpyxl')
-                    mr_potentials, mr_error = compare_addresses(df1_orig, accounts_path, st.session_state.blacklist)
-                    if not mr_error:
-                        st.session_state.mr_potentials = mr_potentials
+                    run_comparison()
                 st.rerun()
 
     # Check file status
     st.subheader("File Status")
     col1, col2 = st.columns(2)
     with col1:
-        st.write(f"**Master List:** {get_file_status(master_path)}")
+        st.write(f"**Master List:** {get_file_status(manifest, master_path)}")
     with col2:
-        st.write(f"**Accounts List:** {get_file_status(accounts_path)}")
+        st.write(f"**Accounts List:** {get_file_status(manifest, accounts_path)}")
 
 # Sidebar: Info/Reset (with collapsible content and protected clear button)
 with st.sidebar:
@@ -722,4 +662,40 @@ with st.sidebar:
                 st.rerun()
             else:
                 st.error("Incorrect password. Try again.")
-                st.session_state.clear_password = ""  # Clear input on error
\ No newline at end of file
+                st.session_state.clear_password = ""  # Clear input on error
+
+# Sidebar: hot-path timings recorded by tracing.py (spans from every session in this process)
+with st.sidebar:
+    with st.expander("Performance Trace (admin)", expanded=False):
+        spans = get_spans()
+        if spans:
+            st.dataframe(pd.DataFrame(summarize(spans)), hide_index=True)
+            st.dataframe(pd.DataFrame(spans[::-1][:50]), hide_index=True)
+            st.download_button("Download Spans (JSONL)", data=to_jsonl(spans), file_name="ltho_spans.jsonl", mime="application/jsonl")
+            if st.button("Append to traces/ltho_spans.jsonl"):
+                st.success(f"Exported {export_jsonl('traces/ltho_spans.jsonl')} spans.")
+            if st.button("Clear Spans"):
+                clear_spans()
+                st.rerun()
+        else:
+            st.info("No spans recorded yet.")
+
+# Sidebar: how much memory the last compare's inputs took once loaded (see loaders.py)
+with st.sidebar:
+    with st.expander("Memory (admin)", expanded=False):
+        st.caption(f"{county} County. Server process: {get_rss_bytes() / 1e6:,.0f} MB resident.")
+        if st.session_state.compare_memory:
+            st.dataframe(pd.DataFrame(st.session_state.compare_memory), hide_index=True)
+        else:
+            st.info("Run a compare to see the size of its loaded lists (compares served from the result cache load none).")
+
+# Debug overlay: per-section render time for this run (open the app with ?debug=1)
+if st.query_params.get('debug') == '1':
+    with st.sidebar:
+        with st.expander("Render Timings (debug)", expanded=True):
+            timings = st.session_state.render_timings
+            st.dataframe(
+                pd.DataFrame({'Section': list(timings), 'ms': [round(ms, 1) for ms in timings.values()]}),
+                hide_index=True,
+            )
+            st.caption(f"Results version {st.session_state.results_version}, blacklist version {st.session_state.blacklist_version}")
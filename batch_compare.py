@@ -0,0 +1,141 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from counties import WY_COUNTIES
+from blacklist import load_blacklist
+from compare_engine import run_comparisons, get_master_path, get_accounts_path
+from result_cache import get_result_cache
+from reports import iter_txt_report, iter_csv_report, write_xlsx_report
+
+# Headless LTHO-HO comparison for many counties in one run, e.g. for the annual overnight job:
+#
+#   python batch_compare.py --applicants "applicants/{county}.xlsx" --output-dir output
+#
+# Master/accounts lists and blacklists are read from master_lists/{county}/ relative to the
+# working directory, the same layout the Streamlit app uses.
+
+OUTPUT_FORMATS = ['txt', 'csv', 'xlsx']
+
+def get_output_prefix(output_dir, county):
+    return os.path.join(output_dir, f"{county.replace(' ', '_')}")
+
+def write_outputs(prefix, common_all, mr_potentials, formats):
+    written = []
+    if 'txt' in formats:
+        with open(f"{prefix}_comparison.txt", 'w', encoding='utf-8') as f:
+            f.writelines(iter_txt_report(common_all))
+        written.append(f"{prefix}_comparison.txt")
+    if 'csv' in formats:
+        for name, df in (('comparison', common_all), ('potentials', mr_potentials)):
+            if df is not None:
+                with open(f"{prefix}_{name}.csv", 'w', encoding='utf-8', newline='') as f:
+                    f.writelines(iter_csv_report(df))
+                written.append(f"{prefix}_{name}.csv")
+    if 'xlsx' in formats:
+        write_xlsx_report(f"{prefix}_comparison.xlsx", common_all, mr_potentials)
+        written.append(f"{prefix}_comparison.xlsx")
+    return written
+
+def new_summary(county):
+    return {'county': county, 'status': 'ok', 'matches': 0, 'potentials': 0, 'seconds': 0.0, 'memory': {},
+            'files': [], 'warnings': [], 'error': ''}
+
+# Keep the in-memory size each comparison stage reports for its loaded frame
+def _memory_recorder(summary):
+    def progress(stage, **fields):
+        if 'memory' in fields:
+            summary['memory'][stage] = fields['memory']
+    return progress
+
+# Compare one county's applicants (workbook bytes or DataFrame) against its master and
+# accounts lists. Returns (summary, common_all, mr_potentials) and never raises, so one bad
+# county doesn't stop a batch. Used by run_county and the statewide dashboard.
+def compare_county(county, applicant):
+    start = time.perf_counter()
+    summary = new_summary(county)
+    common_all = mr_potentials = None
+    try:
+        for label, path in (('master list', get_master_path(county)), ('accounts list', get_accounts_path(county))):
+            if not os.path.exists(path):
+                summary['status'] = 'skipped'
+                summary['error'] = f"Missing {label}: {path}"
+                return summary, None, None
+        common_all, error, mr_potentials, mr_error = run_comparisons(
+            applicant, get_master_path(county), get_accounts_path(county),
+            load_blacklist(county), warn=summary['warnings'].append, cache=get_result_cache(county),
+            progress=_memory_recorder(summary),
+        )
+        errors = [e for e in (error, mr_error) if e]
+        if errors:
+            summary['status'] = 'error'
+            summary['error'] = '; '.join(errors)
+        if common_all is not None:
+            summary['matches'] = len(common_all)
+        if mr_potentials is not None:
+            summary['potentials'] = len(mr_potentials)
+    except Exception as e:
+        summary['status'] = 'error'
+        summary['error'] = str(e)
+    finally:
+        summary['seconds'] = round(time.perf_counter() - start, 3)
+    return summary, common_all, mr_potentials
+
+# Worker: compare one county from its applicant file and write the outputs
+def run_county(county, applicant_path, output_dir, formats):
+    if not os.path.exists(applicant_path):
+        summary = new_summary(county)
+        summary['status'] = 'skipped'
+        summary['error'] = f"Missing applicant file: {applicant_path}"
+        return summary
+    with open(applicant_path, 'rb') as f:
+        applicant_bytes = f.read()
+    summary, common_all, mr_potentials = compare_county(county, applicant_bytes)
+    if summary['status'] != 'skipped':
+        try:
+            summary['files'] = write_outputs(get_output_prefix(output_dir, county), common_all, mr_potentials, formats)
+        except Exception as e:
+            summary['status'] = 'error'
+            summary['error'] = str(e)
+    return summary
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the LTHO-HO comparison for one or more counties.")
+    parser.add_argument('--applicants', default='applicants/{county}.xlsx',
+                        help="Applicant file path pattern; {county} is replaced by the county name (default: %(default)s)")
+    parser.add_argument('--counties', nargs='+', default=WY_COUNTIES, metavar='COUNTY',
+                        help="Counties to process (default: all 23)")
+    parser.add_argument('--output-dir', default='output', help="Directory for output files (default: %(default)s)")
+    parser.add_argument('--formats', nargs='+', choices=OUTPUT_FORMATS, default=OUTPUT_FORMATS,
+                        help="Output formats (default: all)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    unknown = [c for c in args.counties if c not in WY_COUNTIES]
+    if unknown:
+        print(f"Unknown county: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = [
+            pool.submit(run_county, county, args.applicants.format(county=county), args.output_dir, args.formats)
+            for county in args.counties
+        ]
+        for future in as_completed(futures):
+            summary = future.result()
+            if summary['status'] == 'error':
+                failed += 1
+            detail = summary['error'] or f"{summary['matches']} matches, {summary['potentials']} potential M/R matches"
+            print(f"{summary['county']:<12} {summary['status']:<8} {summary['seconds']:>8.2f}s  {detail}")
+            for warning in summary['warnings']:
+                print(f"{'':<12} warning: {warning}")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,4 @@
+# Benchmark suite for the comparison and document search engines. Synthetic county datasets
+# are generated by benchmarks.datasets and timed stage by stage by benchmarks.run:
+#
+#   python -m benchmarks.run --scales 1k 10k --output benchmarks/results/latest.json
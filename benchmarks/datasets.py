@@ -0,0 +1,192 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+# Synthetic county datasets shaped like the real inputs:
+#   applicants.xlsx  HO applicant export (account, owner name, phone, filer address, street parts,
+#                    application date as ISO text)
+#   master.xlsx      LTHO master list (account numbers, some shared with applicants)
+#   accounts.xlsx    county accounts list with an ADDRESS column (some addresses match applicants)
+#   records.xlsx     county Excel export used to enrich the PDF index (ACCOUNTNO, NAME1, ...)
+#   notice_of_value.pdf / declaration.pdf / tax_notice.pdf
+#                    one page per account in the layouts the docs_engine.extract_*_info parsers read
+# Everything is derived from a seeded RNG, so a (scale, seed) pair always produces the same files.
+
+# Bumped when the generated files change shape, so cached datasets are regenerated
+DATASET_VERSION = 2
+
+SCALES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+# PDF page counts are capped: a 1M-page PDF takes far longer to generate than to index and the
+# PDF stages scale linearly with pages. Override with max_pdf_pages.
+MAX_PDF_PAGES = 20_000
+
+# docs_engine account numbers are [RMPO]000 + 4-5 digits, so at most 100k distinct per prefix
+MAX_PDF_ACCOUNTS = 100_000
+
+MASTER_OVERLAP = 0.05      # share of applicants also on the master list
+DUPLICATE_RATE = 0.01      # share of applicant rows repeated (multiple filers per account)
+ADDRESS_OVERLAP = 0.10     # share of accounts-list rows at an applicant's address
+
+FIRST_NAMES = ['JOHN', 'MARY', 'ROBERT', 'LINDA', 'JAMES', 'SUSAN', 'DAVID', 'KAREN', 'WILLIAM', 'NANCY',
+               'RICHARD', 'BETTY', 'THOMAS', 'HELEN', 'CHARLES', 'SANDRA', 'DANIEL', 'DONNA', 'MARK', 'CAROL']
+LAST_NAMES = ['SMITH', 'JOHNSON', 'WILLIAMS', 'BROWN', 'JONES', 'MILLER', 'DAVIS', 'WILSON', 'ANDERSON', 'TAYLOR',
+              'THOMAS', 'MOORE', 'MARTIN', 'JACKSON', 'THOMPSON', 'WHITE', 'HARRIS', 'CLARK', 'LEWIS', 'YOUNG']
+STREET_NAMES = ['MAIN', 'GRAND', 'IVINSON', 'CUSTER', 'GARFIELD', 'SPRING CREEK', 'SNOWY RANGE', 'CENTRAL',
+                'PARK', 'LINCOLN', 'WASHINGTON', 'JACKSON', 'HARNEY', 'BLUEBIRD', 'MEADOWLARK', 'PROSPECT']
+# (applicant spelling, accounts-list spelling): the accounts list uses the long form so the
+# address match has to go through normalize_address
+STREET_TYPES = [('ST', 'STREET'), ('AVE', 'AVENUE'), ('DR', 'DRIVE'), ('RD', 'ROAD'), ('CT', 'COURT'),
+                ('LN', 'LANE'), ('CIR', 'CIRCLE'), ('BLVD', 'BOULEVARD'), ('PL', 'PLACE')]
+PREDIRECTIONS = ['', '', '', 'N', 'S', 'E', 'W']
+BUSINESS_NAMES = ['', '', '', 'RANCH LLC', 'HOLDINGS INC', 'FAMILY TRUST', 'PROPERTIES LLC']
+
+PDF_TYPES = {
+    'Notice of Value': 'notice_of_value.pdf',
+    'Declaration': 'declaration.pdf',
+    'Tax Notice': 'tax_notice.pdf',
+}
+
+def parse_scale(label):
+    label = str(label).lower()
+    if label in SCALES:
+        return SCALES[label]
+    return int(label)
+
+def get_dataset_dir(root, scale, seed):
+    return os.path.join(root, f"{scale}_seed{seed}")
+
+# Fast workbook writer: write-only openpyxl streams rows instead of building the sheet in memory
+def write_xlsx(path, df):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(df.columns))
+    for row in df.itertuples(index=False, name=None):
+        ws.append([None if isinstance(v, float) and np.isnan(v) else v for v in row])
+    wb.save(path)
+
+def _pick(rng, values, n):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), n)]
+
+def _mr_accounts(rng, n, offset=0):
+    prefixes = _pick(rng, ['R', 'R', 'R', 'M'], n)
+    return [f"{p}{i:07d}" for p, i in zip(prefixes, range(offset + 1, offset + n + 1))]
+
+def make_applicants(rng, n):
+    types = rng.integers(0, len(STREET_TYPES), n)
+    df = pd.DataFrame({
+        'Account Number': _mr_accounts(rng, n),
+        'Owner Name': [f"{last} {first}" for last, first in zip(_pick(rng, LAST_NAMES, n), _pick(rng, FIRST_NAMES, n))],
+        'Phone': [f"307-{a:03d}-{b:04d}" for a, b in zip(rng.integers(200, 999, n), rng.integers(0, 9999, n))],
+        'Predirection': _pick(rng, PREDIRECTIONS, n),
+        'Street Number': rng.integers(1, 9999, n),
+        'Street Name': _pick(rng, STREET_NAMES, n),
+        'Street Type': [STREET_TYPES[t][0] for t in types],
+    })
+    df['Filer Address'] = (df['Street Number'].astype(str) + ' ' + df['Street Name'] + ' ' + df['Street Type'])
+    # Exported as text, which the CSV readers must not turn into timestamps
+    df['Application Date'] = (np.datetime64('2025-01-02') + rng.integers(0, 120, n)).astype(str)
+    duplicates = df.sample(frac=DUPLICATE_RATE, random_state=int(rng.integers(0, 2**31)))
+    return pd.concat([df, duplicates], ignore_index=True)
+
+def make_master(rng, applicants, n):
+    shared = applicants['Account Number'].drop_duplicates().sample(
+        frac=MASTER_OVERLAP, random_state=int(rng.integers(0, 2**31))).tolist()
+    others = _mr_accounts(rng, max(0, n - len(shared)), offset=len(applicants) + 1)
+    accounts = shared + others
+    return pd.DataFrame({
+        'Account': accounts,
+        'Owner': [f"{last} {first}" for last, first in zip(_pick(rng, LAST_NAMES, len(accounts)), _pick(rng, FIRST_NAMES, len(accounts)))],
+    })
+
+def make_accounts(rng, applicants, n):
+    overlap = applicants.sample(n=min(len(applicants), int(n * ADDRESS_OVERLAP)), random_state=int(rng.integers(0, 2**31)))
+    long_types = {short: full for short, full in STREET_TYPES}
+    overlap_addr = (overlap['Predirection'] + ' ' +
+                    overlap['Street Number'].astype(str) + ' ' + overlap['Street Name'] + ' ' +
+                    overlap['Street Type'].map(long_types)).str.strip()
+    rest = n - len(overlap)
+    rest_addr = [f"{num} {name} {STREET_TYPES[t][1]}" for num, name, t in zip(
+        rng.integers(1, 9999, rest), _pick(rng, STREET_NAMES, rest), rng.integers(0, len(STREET_TYPES), rest))]
+    addresses = overlap_addr.tolist() + rest_addr
+    prefixes = _pick(rng, ['R', 'R', 'M', 'P', 'O'], n)
+    return pd.DataFrame({
+        'ACCOUNTNO': [f"{p}{i:07d}" for p, i in zip(prefixes, range(2_000_001, 2_000_001 + n))],
+        'ADDRESS': addresses,
+    })
+
+# Accounts that appear in the PDFs, in docs_engine's [RMPO]000 + 4-5 digit form
+def make_records(rng, n):
+    n = min(n, MAX_PDF_ACCOUNTS)
+    prefixes = _pick(rng, ['R', 'R', 'R', 'M', 'P'], n)
+    types = rng.integers(0, len(STREET_TYPES), n)
+    return pd.DataFrame({
+        'ACCOUNTNO': [f"{p}000{i:05d}" for p, i in zip(prefixes, range(n))],
+        'NAME1': [f"{last} {first}" for last, first in zip(_pick(rng, LAST_NAMES, n), _pick(rng, FIRST_NAMES, n))],
+        'BUSINESSNAME': _pick(rng, BUSINESS_NAMES, n),
+        'PREDIRECTION': _pick(rng, PREDIRECTIONS, n),
+        'STREETNO': rng.integers(1, 9999, n).astype(str),
+        'POSTDIRECTION': '',
+        'STREETNAME': _pick(rng, STREET_NAMES, n),
+        'STREETTYPE': [STREET_TYPES[t][0] for t in types],
+        'Local Number': [f"{i:04d}" for i in rng.integers(1, 99999, n)],
+    })
+
+# Page text in the layout each extract_*_info parser expects
+def page_text(search_type, record):
+    account, local = record['ACCOUNTNO'], record['Local Number']
+    address = ' '.join(p for p in (record['PREDIRECTION'], record['STREETNO'], record['STREETNAME'], record['STREETTYPE']) if p)
+    if search_type == 'Notice of Value':
+        return (f"NOTICE OF VALUE\nALBANY COUNTY ASSESSOR\nAccount Number\n{account}\n{local}\n"
+                f"{record['NAME1']}\n{address}\nPROPERTY CLASSIFICATION RESIDENTIAL\n")
+    if search_type == 'Declaration':
+        return (f"PROPERTY DECLARATION\nAccount: {account}\nOwner: {record['NAME1']}\n"
+                f"Report all property owned as of\nJanuary 1, 2025\n{local[-4:]}\n{address}\n")
+    return (f"TAX NOTICE\nLOCAL/REALWARE ID # {local}/{account}\n{record['NAME1']}\n{address}\n"
+            f"FIRST HALF DUE NOVEMBER 10\n")
+
+def write_pdf(path, search_type, records, pages):
+    import fitz  # PyMuPDF, only needed for the PDF datasets
+    doc = fitz.open()
+    for page_num in range(pages):
+        record = records.iloc[page_num % len(records)]
+        page = doc.new_page()
+        page.insert_text((72, 72), page_text(search_type, record), fontsize=10)
+    doc.save(path, garbage=1, deflate=True)
+    doc.close()
+
+# Generate (or reuse) the dataset for one scale; returns its directory and a manifest dict
+def generate_dataset(root, scale, seed=0, pdf=True, max_pdf_pages=MAX_PDF_PAGES):
+    path = get_dataset_dir(root, scale, seed)
+    manifest_path = os.path.join(path, 'manifest.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == DATASET_VERSION and (manifest.get('pdf_pages') or not pdf):
+            return path, manifest
+    os.makedirs(path, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    applicants = make_applicants(rng, scale)
+    master = make_master(rng, applicants, scale)
+    accounts = make_accounts(rng, applicants, scale)
+    records = make_records(rng, scale)
+    for name, df in (('applicants', applicants), ('master', master), ('accounts', accounts), ('records', records)):
+        write_xlsx(os.path.join(path, f"{name}.xlsx"), df)
+
+    pdf_pages = 0
+    if pdf:
+        pdf_pages = min(scale, max_pdf_pages)
+        for search_type, file_name in PDF_TYPES.items():
+            write_pdf(os.path.join(path, file_name), search_type, records, pdf_pages)
+
+    manifest = {
+        'version': DATASET_VERSION, 'scale': scale, 'seed': seed,
+        'applicant_rows': len(applicants), 'master_rows': len(master),
+        'accounts_rows': len(accounts), 'record_rows': len(records), 'pdf_pages': pdf_pages,
+    }
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=4)
+    return path, manifest
@@ -0,0 +1,238 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+import pandas as pd
+from blacklist import Blacklist
+from compare_engine import (
+    read_excel, find_account_col, compare_excels, compare_addresses,
+    select_applicant_columns, select_master_columns, select_accounts_columns,
+)
+from loaders import READER_BACKENDS, frame_bytes, read_table, available_backends
+from benchmarks.datasets import SCALES, MAX_PDF_PAGES, PDF_TYPES, parse_scale, generate_dataset
+
+# Time every engine stage on the synthetic datasets and write a JSON report:
+#
+#   python -m benchmarks.run --scales 1k 10k 100k --repeat 3 --output benchmarks/results/latest.json
+#   python -m benchmarks.run --scales 10k --baseline benchmarks/results/baseline.json
+#
+# With --baseline the run exits 1 if any stage's median is more than --threshold slower than
+# the same (scale, stage) in the baseline report. PDF stages need PyMuPDF; without it they are
+# reported as skipped.
+
+DEFAULT_DATA_DIR = os.path.join('benchmarks', 'data')
+SEARCH_QUERIES = 50  # per query kind (account, local number, name/address text)
+EXTRACT_RESULTS = 20
+
+def time_call(func, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return times, result
+
+def stage_result(scale, stage, times, **attrs):
+    return {
+        'scale': scale, 'stage': stage, 'status': 'ok', 'runs': len(times),
+        'min_s': round(min(times), 6), 'median_s': round(statistics.median(times), 6),
+        'mean_s': round(statistics.fmean(times), 6), **attrs,
+    }
+
+def skipped_result(scale, stage, reason):
+    return {'scale': scale, 'stage': stage, 'status': 'skipped', 'reason': reason}
+
+def bench_compare(path, scale, repeat):
+    paths = {name: os.path.join(path, f"{name}.xlsx") for name in ('applicants', 'master', 'accounts')}
+    blacklist = Blacklist()
+    results = []
+
+    times, frames = time_call(lambda: {name: read_excel(p) for name, p in paths.items()}, repeat)
+    rows = sum(len(df) for df in frames.values())
+    results.append(stage_result(scale, 'excel_load', times, rows=rows,
+                                bytes=sum(os.path.getsize(p) for p in paths.values()),
+                                memory=sum(frame_bytes(df) for df in frames.values())))
+
+    # The same workbooks through the schema-aware loader the comparisons use
+    selects = {'applicants': select_applicant_columns, 'master': select_master_columns, 'accounts': select_accounts_columns}
+    times, projected = time_call(lambda: {name: read_excel(p, select=selects[name]) for name, p in paths.items()}, repeat)
+    results.append(stage_result(scale, 'excel_load_projected', times, rows=rows,
+                                memory=sum(frame_bytes(df) for df in projected.values())))
+
+    results += bench_readers(path, scale, repeat, frames)
+
+    times, _ = time_call(lambda: [find_account_col(df) for df in frames.values()], repeat)
+    results.append(stage_result(scale, 'find_account_col', times, rows=rows))
+
+    # The comparison stages take the already-loaded applicant frame, as run_comparisons does;
+    # their times still include reading the master/accounts workbook
+    applicants = frames['applicants']
+    times, (common_all, error) = time_call(lambda: compare_excels(applicants, paths['master'], blacklist), repeat)
+    results.append(stage_result(scale, 'join', times, rows=len(applicants),
+                                matches=0 if common_all is None else len(common_all), error=error))
+
+    times, (potentials, error) = time_call(lambda: compare_addresses(applicants, paths['accounts'], blacklist), repeat)
+    results.append(stage_result(scale, 'address_match', times, rows=len(applicants),
+                                potentials=0 if potentials is None else len(potentials), error=error))
+    return results
+
+# Every reader backend on the same inputs: the workbooks as generated and the same frames as CSV
+# (.xls can't be written here, so its backends aren't timed). identical is False when a backend's
+# frames differ from the reference frames loaded by read_excel; the applicants' ISO date column
+# checks that no CSV backend types dates the others leave as text.
+def bench_readers(path, scale, repeat, frames):
+    inputs = {'xlsx': {name: os.path.join(path, f"{name}.xlsx") for name in frames}}
+    inputs['csv'] = {name: os.path.join(path, f"{name}.csv") for name in frames}
+    for name, df in frames.items():
+        csv_path = inputs['csv'][name]
+        if not os.path.exists(csv_path) or os.path.getmtime(csv_path) < os.path.getmtime(inputs['xlsx'][name]):
+            df.to_csv(csv_path, index=False)
+    results = []
+    for fmt, paths in inputs.items():
+        installed = available_backends(fmt)
+        for backend, module in READER_BACKENDS[fmt]:
+            stage = f"read_{fmt}_{backend}"
+            if backend not in installed:
+                results.append(skipped_result(scale, stage, f"{module} is not installed"))
+                continue
+            times, loaded = time_call(lambda: {name: read_table(p, backend=backend) for name, p in paths.items()}, repeat)
+            results.append(stage_result(scale, stage, times, rows=sum(len(df) for df in loaded.values()),
+                                        bytes=sum(os.path.getsize(p) for p in paths.values()),
+                                        identical=all(loaded[name].equals(frames[name]) for name in frames)))
+    return results
+
+def _search_queries(index_data):
+    accounts = list(index_data)[:SEARCH_QUERIES]
+    locals_ = [index_data[a]['local_number'] for a in accounts if len(index_data[a]['local_number']) >= 4]
+    texts = [index_data[a]['ownership_name'].split(' ')[0] for a in accounts if index_data[a]['ownership_name']]
+    return accounts + locals_ + texts
+
+def bench_docs(path, scale, repeat):
+    from docs_engine import build_index, search_matches, extract_pdf  # needs PyMuPDF
+
+    records_path = os.path.join(path, 'records.xlsx')
+    index_times, search_times, extract_times = [], [], []
+    pages = accounts = results_found = 0
+    for search_type, file_name in PDF_TYPES.items():
+        pdf_path = os.path.join(path, file_name)
+        times, index_data = time_call(lambda: build_index(pdf_path, records_path, search_type), repeat)
+        index_times.append(times)
+        accounts += len(index_data)
+        pages += sum(len(entry['pages']) for entry in index_data.values())
+
+        queries = _search_queries(index_data)
+        times, found = time_call(lambda: [search_matches(index_data, q, search_type) for q in queries], repeat)
+        search_times.append(times)
+        results_found += sum(len(r) for r in found)
+
+        selected = [r[0] for r in found if r][:EXTRACT_RESULTS]
+        times, _ = time_call(lambda: [extract_pdf(pdf_path, res) for res in selected], repeat)
+        extract_times.append(times)
+
+    # One result per stage covering all three document types
+    total = lambda per_type: [sum(run) for run in zip(*per_type)]
+    return [
+        stage_result(scale, 'pdf_index', total(index_times), pages=pages, accounts=accounts),
+        stage_result(scale, 'search', total(search_times), queries=results_found),
+        stage_result(scale, 'extract', total(extract_times), extracts=EXTRACT_RESULTS * len(PDF_TYPES)),
+    ]
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def run_benchmarks(scales, repeat=3, data_dir=DEFAULT_DATA_DIR, seed=0, pdf=True, max_pdf_pages=MAX_PDF_PAGES, log=print):
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'repeat': repeat, 'seed': seed,
+        'datasets': {}, 'results': [],
+    }
+    pdf_skip = None if pdf else 'PDF stages disabled (--no-pdf)'
+    if pdf:
+        try:
+            import fitz  # noqa: F401
+        except ImportError:
+            pdf_skip = 'PyMuPDF is not installed'
+    for label in scales:
+        scale = parse_scale(label)
+        log(f"[{label}] generating dataset...")
+        path, manifest = generate_dataset(data_dir, scale, seed=seed, pdf=pdf_skip is None, max_pdf_pages=max_pdf_pages)
+        report['datasets'][label] = manifest
+        results = bench_compare(path, label, repeat)
+        if pdf_skip is None:
+            results += bench_docs(path, label, repeat)
+        else:
+            results += [skipped_result(label, stage, pdf_skip) for stage in ('pdf_index', 'search', 'extract')]
+        for result in results:
+            if result['status'] == 'ok':
+                log(f"[{label}] {result['stage']:<20} median {result['median_s']:>10.4f}s  min {result['min_s']:>10.4f}s")
+            else:
+                log(f"[{label}] {result['stage']:<20} skipped: {result['reason']}")
+        report['results'] += results
+    return report
+
+# Stages whose median got slower than the baseline by more than threshold (0.2 = 20%)
+def find_regressions(report, baseline, threshold):
+    base = {(r['scale'], r['stage']): r for r in baseline.get('results', []) if r.get('status') == 'ok'}
+    regressions = []
+    for result in report['results']:
+        previous = base.get((result['scale'], result['stage']))
+        if result['status'] != 'ok' or previous is None or previous['median_s'] <= 0:
+            continue
+        change = result['median_s'] / previous['median_s'] - 1
+        if change > threshold:
+            regressions.append({'scale': result['scale'], 'stage': result['stage'],
+                                'baseline_s': previous['median_s'], 'median_s': result['median_s'],
+                                'change': round(change, 4)})
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the comparison and document search engines on synthetic data.")
+    parser.add_argument('--scales', nargs='+', default=['1k', '10k'], metavar='SCALE',
+                        help=f"Dataset sizes: {', '.join(SCALES)} or a row count (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per stage (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0, help="Dataset RNG seed (default: %(default)s)")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help="Where generated datasets are kept (default: %(default)s)")
+    parser.add_argument('--max-pdf-pages', type=int, default=MAX_PDF_PAGES, help="PDF page cap per document (default: %(default)s)")
+    parser.add_argument('--no-pdf', action='store_true', help="Skip PDF generation and the PDF stages")
+    parser.add_argument('--output', help="Write the JSON report here (default: stdout)")
+    parser.add_argument('--baseline', help="Earlier JSON report to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Allowed slowdown vs. the baseline (default: %(default)s)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    log = lambda message: print(message, file=sys.stderr)
+    report = run_benchmarks(args.scales, repeat=max(1, args.repeat), data_dir=args.data_dir, seed=args.seed,
+                            pdf=not args.no_pdf, max_pdf_pages=args.max_pdf_pages, log=log)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = find_regressions(report, json.load(f), args.threshold)
+        report['baseline'] = {'path': args.baseline, 'threshold': args.threshold, 'regressions': regressions}
+        for r in regressions:
+            log(f"REGRESSION [{r['scale']}] {r['stage']}: {r['baseline_s']:.4f}s -> {r['median_s']:.4f}s (+{r['change']:.0%})")
+
+    text = json.dumps(report, indent=4)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import os
+import sys
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from blacklist import add_to_blacklist, load_blacklist
+from storage import read_json, update_json
+
+# Hammer the locked read-modify-write path in storage.py from several processes, each running
+# several threads, and check that no update was lost:
+#
+#   python -m benchmarks.stress_storage --processes 5 --threads 10 --entries 10
+#
+# Every thread adds its own blacklist entries one at a time (add_to_blacklist) and bumps a
+# shared counter file (update_json), so the final blacklist must hold processes * threads *
+# entries rows and the counter must equal the same number. Exits 1 on a lost update.
+
+COUNTY = 'Stress'
+COUNTER_FILE = 'counter.json'
+
+def _bump(counter):
+    counter['count'] = counter.get('count', 0) + 1
+    return counter
+
+def _thread(process_id, thread_id, entries):
+    for i in range(entries):
+        account = f"R{process_id:02d}{thread_id:02d}{i:03d}"
+        add_to_blacklist(COUNTY, [{'account': account, 'applicant_address': '', 'norm_addr': ''}])
+        update_json(COUNTER_FILE, _bump, {})
+
+def _process(work_dir, process_id, threads, entries):
+    os.chdir(work_dir)  # blacklist paths are relative to the app directory
+    workers = [threading.Thread(target=_thread, args=(process_id, t, entries)) for t in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+def run_stress(work_dir, processes, threads, entries):
+    os.makedirs(os.path.join(work_dir, 'master_lists', COUNTY), exist_ok=True)
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        for future in [pool.submit(_process, work_dir, p, threads, entries) for p in range(processes)]:
+            future.result()
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        return len(load_blacklist(COUNTY)), read_json(COUNTER_FILE, {}).get('count', 0)
+    finally:
+        os.chdir(cwd)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stress the locked JSON storage from many processes and threads.")
+    parser.add_argument('--processes', type=int, default=5, help="Writer processes (default: %(default)s)")
+    parser.add_argument('--threads', type=int, default=10, help="Writer threads per process (default: %(default)s)")
+    parser.add_argument('--entries', type=int, default=10, help="Blacklist adds per thread (default: %(default)s)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    expected = args.processes * args.threads * args.entries
+    with tempfile.TemporaryDirectory(prefix='stress-storage-') as work_dir:
+        entries, count = run_stress(work_dir, args.processes, args.threads, args.entries)
+    print(f"blacklist entries {entries}/{expected}, counter {count}/{expected}")
+    return 0 if entries == expected and count == expected else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
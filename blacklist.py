@@ -0,0 +1,121 @@
+import hashlib
+import json
+from collections import Counter
+from storage import read_json, update_json
+
+# Entry fields, also the column order of the compact on-disk format
+BLACKLIST_COLUMNS = ['applicant_account', 'account', 'applicant_address', 'norm_addr']
+BLACKLIST_FORMAT_VERSION = 2
+
+# Blacklist entries indexed by (applicant_account, account, norm_addr). The account and
+# norm_addr sets used by the comparisons are reference-counted alongside the entries, so
+# membership checks, add and remove are all O(1).
+class Blacklist:
+    def __init__(self, entries=()):
+        self._entries = {}
+        self._account_counts = Counter()
+        self._norm_counts = Counter()
+        for entry in entries:
+            self.add(entry)
+
+    @staticmethod
+    def key(entry):
+        return (entry.get('applicant_account', ''), entry.get('account', ''), entry.get('norm_addr', ''))
+
+    # Blacklisted matching accounts (supports `in`)
+    @property
+    def accounts(self):
+        return self._account_counts.keys()
+
+    # Blacklisted normalized applicant addresses (supports `in`)
+    @property
+    def norm_addrs(self):
+        return self._norm_counts.keys()
+
+    def add(self, entry):
+        entry = {col: entry.get(col, '') or '' for col in BLACKLIST_COLUMNS}
+        key = self.key(entry)
+        if key in self._entries:
+            return False
+        self._entries[key] = entry
+        if entry['account']:
+            self._account_counts[entry['account']] += 1
+        if entry['norm_addr']:
+            self._norm_counts[entry['norm_addr']] += 1
+        return True
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        for counts, value in ((self._account_counts, entry['account']), (self._norm_counts, entry['norm_addr'])):
+            if value:
+                counts[value] -= 1
+                if counts[value] <= 0:
+                    del counts[value]
+        return True
+
+    def keys(self):
+        return list(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __iter__(self):
+        return iter(self._entries.values())
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Content hash, independent of entry order; identifies this blacklist version in cache keys
+    def fingerprint(self):
+        data = json.dumps(sorted(self._entries), separators=(',', ':'))
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    # Compact on-disk form: one row per entry in BLACKLIST_COLUMNS order
+    def to_json(self):
+        return {
+            'version': BLACKLIST_FORMAT_VERSION,
+            'columns': BLACKLIST_COLUMNS,
+            'rows': [[entry[col] for col in BLACKLIST_COLUMNS] for entry in self._entries.values()],
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        if isinstance(data, dict):
+            columns = data.get('columns', BLACKLIST_COLUMNS)
+            return cls(dict(zip(columns, row)) for row in data.get('rows', []))
+        if isinstance(data, list) and data and isinstance(data[0], str):
+            # Migrate old format: list of strings to list of dicts
+            return cls({'account': acc, 'applicant_address': '', 'norm_addr': ''} for acc in data)
+        return cls(data or [])
+
+def get_blacklist_path(county):
+    return f"master_lists/{county}/blacklist.json"
+
+def load_blacklist(county):
+    return Blacklist.from_json(read_json(get_blacklist_path(county), []))
+
+def _update_blacklist(county, apply):
+    merged = None
+    def merge(current):
+        nonlocal merged
+        merged = Blacklist.from_json(current)
+        apply(merged)
+        return merged.to_json()
+    update_json(get_blacklist_path(county), merge, [], separators=(',', ':'))
+    return merged
+
+# Blacklist edits are merged into the file under its lock (another clerk may have changed it
+# since this session loaded it) and return the merged Blacklist for the session.
+def add_to_blacklist(county, entries):
+    def apply(blacklist):
+        for entry in entries:
+            blacklist.add(entry)
+    return _update_blacklist(county, apply)
+
+def remove_from_blacklist(county, keys):
+    def apply(blacklist):
+        for key in keys:
+            blacklist.remove(key)
+    return _update_blacklist(county, apply)
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+# Connected groups of accounts for the potential M/R matches: an applicant account and the M/R
+# account it shares an address with are linked, so applicants at one address, and addresses
+# that share an M/R account, end up in one cluster. Union-find with path halving and union by
+# size over integer-coded accounts, so clustering is near-linear in the number of links.
+
+class UnionFind:
+    def __init__(self, size):
+        # Plain lists: element access from Python is much cheaper than on numpy arrays
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, node):
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return a
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return a
+
+    # Root of every node
+    def roots(self):
+        return np.array([self.find(node) for node in range(len(self.parent))], dtype=np.int64)
+
+# Cluster number (1, 2, ... in order of first appearance) of each link left[i] - right[i]
+def cluster_links(left, right):
+    codes, uniques = pd.factorize(pd.concat([pd.Series(left, dtype=object), pd.Series(right, dtype=object)], ignore_index=True))
+    left_codes, right_codes = codes[:len(left)], codes[len(left):]
+    forest = UnionFind(len(uniques))
+    for a, b in zip(left_codes.tolist(), right_codes.tolist()):
+        forest.union(a, b)
+    roots = forest.roots()[left_codes]
+    return pd.factorize(roots)[0] + 1
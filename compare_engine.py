@@ -0,0 +1,417 @@
+import pandas as pd
+import re
+from openpyxl import load_workbook
+from reports import iter_txt_report
+from loaders import read_projected, read_table, sniff_format, frame_bytes, source_key
+from names import score_names, get_owner_index
+from addresses import parse_addresses, encode_components, match_addresses
+from clusters import cluster_links
+from tracing import span, annotate, traced, size_of
+
+# LTHO-HO comparison engine, shared by the Streamlit app and the batch runner.
+# Nothing here depends on Streamlit; callers pass warn= to surface non-fatal warnings, and
+# progress=/cancelled= to follow and stop a long comparison (see compare_jobs.py).
+
+# Rows between progress reports / cancellation checks in the row loops
+PROGRESS_EVERY = 1000
+
+class CompareCancelled(Exception):
+    pass
+
+def parse_filer_name(full_name):
+    full_name = full_name.strip()
+    if not full_name:
+        return ""
+    parts = full_name.split()
+    if len(parts) == 0:
+        return ""
+    last = parts[0]
+    first = ' '.join(parts[1:]) if len(parts) > 1 else ""
+    return f"{last}, {first}"
+
+@traced()
+def find_account_col(df):
+    account_pattern = re.compile(r'^[MR]\d{7}$')
+    for col in df.columns:
+        if df[col].astype(str).str.match(account_pattern, na=False).any():
+            return col
+    return None
+
+def find_name_col(df, exclude=()):
+    for col in df.columns:
+        if col not in exclude and re.search(r'name|owner', col, re.I):
+            return col
+    return None
+
+def find_phone_col(df):
+    for col in df.columns:
+        if re.search(r'phone', col, re.I):
+            return col
+    return None
+
+def get_address(row, original_df):
+    parts = []
+    predir = str(row.get('Predirection', pd.NA)).strip() if pd.notna(row.get('Predirection', pd.NA)) else ""
+    street_no = str(row.get('Street Number', pd.NA)).strip() if pd.notna(row.get('Street Number', pd.NA)) else ""
+    street_name = str(row.get('Street Name', pd.NA)).strip() if pd.notna(row.get('Street Name', pd.NA)) else ""
+    street_type = str(row.get('Street Type', pd.NA)).strip() if pd.notna(row.get('Street Type', pd.NA)) else ""
+    if predir: parts.append(predir)
+    if street_no: parts.append(street_no)
+    if street_name: parts.append(street_name)
+    if street_type: parts.append(street_type)
+    return ' '.join(parts)
+
+def normalize_address(addr):
+    if not addr:
+        return ''
+    addr = addr.lower().strip()
+    # Common replacements: full to abbr
+    replacements = {
+        r'\bstreet\b': 'st',
+        r'\bavenue\b': 'ave',
+        r'\boulevard\b': 'blvd',
+        r'\bdrive\b': 'dr',
+        r'\broad\b': 'rd',
+        r'\bcircle\b': 'cir',
+        r'\bcourt\b': 'ct',
+        r'\blane\b': 'ln',
+        r'\bplace\b': 'pl',
+        r'\balley\b': 'aly',
+        r'\bcenter\b': 'ctr',
+        r'\bhighway\b': 'hwy',
+        # Add more as needed
+    }
+    for full, abbr in replacements.items():
+        addr = re.sub(full, abbr, addr)
+    # Remove extra spaces
+    addr = re.sub(r'\s+', ' ', addr).strip()
+    return addr
+
+def _no_warn(message):
+    pass
+
+def _no_progress(stage, **fields):
+    pass
+
+def _not_cancelled():
+    return False
+
+def _check_cancelled(cancelled):
+    if cancelled():
+        raise CompareCancelled()
+
+ADDRESS_PART_COLUMNS = ['Predirection', 'Street Number', 'Street Name', 'Street Type']
+
+# A column's values as strings, '' where missing or absent (str() of each present value)
+def _text_values(df, col):
+    if col not in df.columns:
+        return [''] * len(df)
+    return [str(value) if pd.notna(value) else '' for value in df[col].tolist()]
+
+# Columns each comparison input is loaded with (see read_excel); None loads every column
+def select_applicant_columns(df):
+    account_col = find_account_col(df)
+    if not account_col:
+        return None
+    filer_address_col = next((col for col in df.columns if 'Filer Address' in col), None)
+    wanted = [account_col, find_name_col(df), find_phone_col(df), filer_address_col] + ADDRESS_PART_COLUMNS
+    return [col for col in df.columns if col in wanted]
+
+def select_master_columns(df):
+    account_col = find_account_col(df)
+    return [col for col in df.columns if col in (account_col, find_name_col(df, exclude=(account_col,)))] if account_col else None
+
+def select_accounts_columns(df):
+    account_col = find_account_col(df)
+    return [col for col in df.columns if col in (account_col, 'ADDRESS')] if account_col else None
+
+# Workbook reads go through here so they are traced (bytes read, rows loaded, memory). .xlsx,
+# .xls and CSV are all accepted (loaders.read_table). With select, only the columns the
+# comparison needs are loaded, with compact dtypes (loaders.py).
+def read_excel(source, select=None):
+    with span('read_excel', bytes=size_of(source)):
+        if select is not None:
+            df = read_projected(source, select)
+        else:
+            df = read_table(source)
+        annotate(rows=len(df), columns=len(df.columns), memory=frame_bytes(df))
+        return df
+
+# Applicant input is either the uploaded workbook bytes or an already-loaded DataFrame
+def read_applicant(applicant):
+    if isinstance(applicant, pd.DataFrame):
+        return applicant
+    return read_excel(applicant, select=select_applicant_columns)
+
+@traced()
+def compare_excels(df1_bytes, df2_path, blacklist, warn=_no_warn, progress=_no_progress, cancelled=_not_cancelled):
+    blacklist_accounts = blacklist.accounts
+    try:
+        df1_orig = read_applicant(df1_bytes)
+        df2_orig = read_excel(df2_path, select=select_master_columns)
+        progress('matches', rows=len(df2_orig), memory=frame_bytes(df2_orig))
+        _check_cancelled(cancelled)
+
+        if df1_orig.empty or df2_orig.empty:
+            return None, "One or both files are empty."
+
+        key_col1 = find_account_col(df1_orig)
+        key_col2 = find_account_col(df2_orig)
+        if not key_col1 or not key_col2:
+            return None, "Could not identify account number column (M/R + 7 digits) in one or both files."
+
+        name_col1 = find_name_col(df1_orig)
+        owner_col2 = find_name_col(df2_orig, exclude=(key_col2,))
+        phone_col1 = find_phone_col(df1_orig)
+        filer_address_col1 = next((col for col in df1_orig.columns if 'Filer Address' in col), None)
+
+        if not name_col1:
+            warn("Name column not found. Will skip name comparison.")
+        if not phone_col1:
+            warn("Phone column not found. Will skip phone comparison.")
+        if not filer_address_col1:
+            warn("Filer Address column not found. Will skip filer address.")
+        if not owner_col2:
+            warn("Owner name column not found in master list. Will skip the owner name check.")
+
+        account_pattern = re.compile(r'^[MR]\d{7}$')
+        df1 = df1_orig[df1_orig[key_col1].astype(str).str.match(account_pattern, na=False)].copy()
+        df2 = df2_orig[df2_orig[key_col2].astype(str).str.match(account_pattern, na=False)].copy()
+
+        if df1.empty or df2.empty:
+            return None, "No valid account numbers found in one or both files after filtering."
+
+        df1.set_index(key_col1, inplace=True)
+        df2.set_index(key_col2, inplace=True)
+        common = df1[df1.index.isin(df2.index)]
+        # Filter out blacklisted accounts
+        common = common[~common.index.isin(blacklist_accounts)]
+        # Owner of record per account (first master row)
+        owners = df2[owner_col2].groupby(level=0).first() if owner_col2 else None
+
+        common_display = []
+        with span('build_display_rows', rows=len(common)):
+            for group_num, (name, group) in enumerate(common.groupby(level=0)):
+                if group_num % PROGRESS_EVERY == 0:
+                    _check_cancelled(cancelled)
+                    progress('matches', matches=len(common_display))
+                count = len(group)
+                owner = owners.get(name) if owners is not None else None
+                owner = str(owner) if owner is not None and pd.notna(owner) else ''
+                if count > 1:
+                    note_row = {
+                        'Account Number': f"*** The below account has {count} entries ***",
+                        'Name': '', 'Owner Name': '', 'Address': '', 'Filer Name': '', 'Filer Address': '', 'Filer Phone': ''
+                    }
+                    common_display.append(note_row)
+                for _, sub_row in group.iterrows():
+                    name_f1 = sub_row.get(name_col1, pd.NA) if name_col1 else pd.NA
+                    phone_f1 = sub_row.get(phone_col1, pd.NA) if phone_col1 else pd.NA
+                    addr_f1 = get_address(sub_row, df1_orig)
+                    filer_addr_f1 = sub_row.get(filer_address_col1, pd.NA) if filer_address_col1 else pd.NA
+
+                    display_row = {
+                        'Account Number': name,
+                        'Name': str(name_f1) if pd.notna(name_f1) else '',
+                        'Owner Name': owner,
+                        'Address': addr_f1,
+                        'Filer Name': parse_filer_name(str(name_f1) if pd.notna(name_f1) else ''),
+                        'Filer Address': str(filer_addr_f1) if pd.notna(filer_addr_f1) else '',
+                        'Filer Phone': str(phone_f1) if pd.notna(phone_f1) else ''
+                    }
+                    common_display.append(display_row)
+
+        common_all = pd.DataFrame(common_display)
+        if owner_col2 and not common_all.empty:
+            with span('score_owner_names', rows=len(common_all)):
+                owner_index = get_owner_index(source_key(df2_path), owners.dropna().astype(str).tolist())
+                similarity = score_names(common_all['Name'], common_all['Owner Name'], owner_index)
+                common_all.insert(common_all.columns.get_loc('Owner Name') + 1, 'Name Similarity', similarity)
+        else:
+            common_all = common_all.drop(columns=['Owner Name'], errors='ignore')
+        annotate(applicant_rows=len(df1_orig), master_rows=len(df2_orig), matches=len(common_all))
+        progress('matches', matches=len(common_all), done=True)
+        return common_all, None
+    except CompareCancelled:
+        raise
+    except Exception as e:
+        return None, f"Failed to compare files: {str(e)}"
+
+@traced()
+def compare_addresses(df1_orig, accounts_path, blacklist, progress=_no_progress, cancelled=_not_cancelled):
+    blacklist_norms = blacklist.norm_addrs
+    try:
+        accounts_df = read_excel(accounts_path, select=select_accounts_columns)
+        progress('potentials', rows=len(accounts_df), memory=frame_bytes(accounts_df))
+        _check_cancelled(cancelled)
+        if accounts_df.empty:
+            return None, "Accounts file is empty."
+
+        account_col = find_account_col(accounts_df)
+        if not account_col:
+            return None, "Could not identify account number column in accounts file."
+
+        blacklist_accounts = blacklist.accounts
+        # Filter for M and R accounts
+        mr_df = accounts_df[accounts_df[account_col].astype(str).str.match(r'^[MR]\d{7}$', na=False)].copy()
+        # Filter out blacklisted accounts
+        mr_df = mr_df[~mr_df[account_col].isin(blacklist_accounts)]
+
+        if mr_df.empty:
+            return pd.DataFrame(), None
+
+        # Applicant addresses from their parts (rows whose normalized address is blacklisted
+        # are skipped); repeated applicant rows (same account and address) count once
+        with span('parse_applicant_addresses', rows=len(df1_orig)):
+            app_account_col = find_account_col(df1_orig)
+            app_accounts = _text_values(df1_orig, app_account_col) if app_account_col else [''] * len(df1_orig)
+            app_parts = [_text_values(df1_orig, col) for col in ADDRESS_PART_COLUMNS]
+            app_addrs = [' '.join(part.strip() for part in parts if part.strip()) for parts in zip(*app_parts)]
+            applicants = pd.DataFrame({'Account': app_accounts, 'Address': app_addrs})
+            applicants = applicants[applicants['Address'] != '']
+            if len(blacklist_norms):
+                norms = applicants['Address'].map(normalize_address)
+                applicants = applicants[~norms.isin(blacklist_norms)]
+            applicants = applicants.drop_duplicates().reset_index(drop=True)
+            # Applicants without an account (no account column, or a blank cell) are shown as N/A
+            # but clustered by their own address: a shared 'N/A' would link them all together
+            unknown = applicants['Account'].str.strip() == ''
+            applicants['Key'] = applicants['Account'].where(~unknown, 'row ' + applicants.index.astype(str))
+            applicants.loc[unknown, 'Account'] = 'N/A'
+            app_parsed = parse_addresses(applicants['Address'])
+        _check_cancelled(cancelled)
+
+        with span('parse_mr_addresses', rows=len(mr_df)):
+            mr = pd.DataFrame({'Account': mr_df[account_col].to_numpy(), 'Address': _text_values(mr_df, 'ADDRESS')})
+            mr = mr[mr['Address'] != ''].reset_index(drop=True)
+            mr_parsed = parse_addresses(mr['Address'])
+            progress('potentials', addresses=len(mr_df))
+        _check_cancelled(cancelled)
+
+        # Integer-coded components; exact and relaxed matches are hash joins on the codes
+        with span('match_addresses', applicants=len(applicants), mr=len(mr)):
+            app_codes, mr_codes = encode_components(app_parsed, mr_parsed)
+            pairs = match_addresses(app_codes, mr_codes)
+            rep = applicants.iloc[pairs['_left'].to_numpy()].reset_index(drop=True)
+            matched = mr.iloc[pairs['_right'].to_numpy()].reset_index(drop=True)
+            potentials_df = pd.DataFrame({
+                'Applicant Account': rep['Account'],
+                'Applicant Address': rep['Address'],
+                'Matching Account': matched['Account'],
+                'Matching Address': matched['Address'],
+                'Match': pairs['level'].to_numpy(),
+                '_key': rep['Key'],
+            })
+            potentials_df = potentials_df[potentials_df['Applicant Account'] != potentials_df['Matching Account']]
+            potentials_df = potentials_df.sort_values(['Applicant Address', 'Matching Account'], kind='stable')
+
+        # Every applicant at an address is kept; accounts linked through shared addresses or
+        # shared M/R accounts form one cluster (clusters.py), numbered in address order
+        with span('cluster_potentials', rows=len(potentials_df)):
+            potentials_df.insert(0, 'Cluster', cluster_links(potentials_df.pop('_key'), potentials_df['Matching Account']))
+            potentials_df = potentials_df.sort_values(['Cluster', 'Applicant Address', 'Matching Account'], kind='stable')
+            potentials_df = potentials_df.reset_index(drop=True)
+
+        annotate(applicant_rows=len(df1_orig), accounts_rows=len(accounts_df), potentials=len(potentials_df))
+        progress('potentials', addresses=len(mr_df), potentials=len(potentials_df), done=True)
+        return potentials_df, None
+    except CompareCancelled:
+        raise
+    except Exception as e:
+        return None, f"Failed to compare addresses: {str(e)}"
+
+# Both comparisons for one applicant file (bytes or DataFrame, read once); each stage
+# reports its own error. With an executor the two independent stages run concurrently.
+# With a cache (result_cache.ResultCache) a stage whose inputs were compared before is loaded
+# instead of run, and the applicant file is only read if a stage still has to run;
+# on_applicant(df) receives the frame when it is. Raises CompareCancelled once cancelled()
+# returns True.
+@traced()
+def run_comparisons(applicant, master_path, accounts_path, blacklist, warn=_no_warn,
+                    executor=None, progress=_no_progress, cancelled=_not_cancelled, cache=None,
+                    on_applicant=None):
+    keys = cache.keys(applicant, master_path, accounts_path, blacklist) if cache is not None else {}
+    results = {}  # stage -> (df, error)
+    for stage, key in keys.items():
+        hit = cache.get(key)
+        if hit is not None:
+            df, warnings = hit
+            for message in warnings:
+                warn(message)
+            results[stage] = (df, None)
+            progress(stage, cached=True, done=True, **{stage: len(df)})
+    annotate(cached=sorted(results))
+    if len(results) == 2:
+        progress('applicant', cached=True, done=True)
+        return results['matches'] + results['potentials']
+
+    try:
+        df1_orig = read_applicant(applicant)
+    except Exception as e:
+        error = f"Failed to read applicant file: {str(e)}"
+        return None, error, None, error
+    progress('applicant', rows=len(df1_orig), memory=frame_bytes(df1_orig), done=True)
+    if on_applicant is not None:
+        on_applicant(df1_orig)
+    _check_cancelled(cancelled)
+
+    warnings = []
+    def warn_and_keep(message):
+        warnings.append(message)
+        warn(message)
+    stages = {
+        'matches': lambda: compare_excels(df1_orig, master_path, blacklist, warn=warn_and_keep, progress=progress, cancelled=cancelled),
+        'potentials': lambda: compare_addresses(df1_orig, accounts_path, blacklist, progress=progress, cancelled=cancelled),
+    }
+    pending = [stage for stage in stages if stage not in results]
+    if executor is None or len(pending) < 2:
+        for stage in pending:
+            results[stage] = stages[stage]()
+    else:
+        futures = {stage: executor.submit(stages[stage]) for stage in pending}
+        for stage, future in futures.items():
+            results[stage] = future.result()
+    for stage in pending:
+        df, error = results[stage]
+        if error is None and stage in keys:
+            cache.put(keys[stage], df, warnings if stage == 'matches' else ())
+    return results['matches'] + results['potentials']
+
+def generate_txt_output(common_all):
+    return ''.join(iter_txt_report(common_all))
+
+def get_master_path(county):
+    return f"master_lists/{county}/master.xlsx"
+
+def get_accounts_path(county):
+    return f"master_lists/{county}/accounts.xlsx"
+
+# Streaming scan of a saved workbook's first sheet for an M/R account number, so uploads are
+# validated without loading them into a DataFrame. Returns an error message or None.
+def validate_account_workbook(file_path):
+    account_pattern = re.compile(r'^[MR]\d{7}$')
+    try:
+        fmt = sniff_format(file_path)
+    except (OSError, ValueError) as e:
+        return f"Could not read workbook: {str(e)}"
+    if fmt != 'xlsx':
+        try:
+            df = read_table(file_path, header=None)
+        except Exception as e:
+            return f"Could not read workbook: {str(e)}"
+        for row in df.itertuples(index=False, name=None):
+            if any(pd.notna(value) and account_pattern.match(str(value).strip()) for value in row):
+                return None
+        return "No account numbers (M/R + 7 digits) found in uploaded file."
+    try:
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+    except Exception as e:
+        return f"Could not read workbook: {str(e)}"
+    try:
+        for row in wb.worksheets[0].iter_rows(values_only=True):
+            for value in row:
+                if value is not None and account_pattern.match(str(value).strip()):
+                    return None
+    finally:
+        wb.close()
+    return "No account numbers (M/R + 7 digits) found in uploaded file."
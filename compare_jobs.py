@@ -0,0 +1,89 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from compare_engine import run_comparisons, CompareCancelled
+from tracing import set_context
+
+# Background LTHO-HO comparisons for the Streamlit app. A CompareJob runs run_comparisons off
+# the script thread, with the two comparison stages in parallel, and keeps a progress
+# snapshot the page can poll while it stays responsive. cancel() stops the job at the next
+# row-loop check (compare_engine.PROGRESS_EVERY rows).
+#
+# Threads rather than processes: the stages report progress and check for cancellation through
+# shared objects, and most of the time is spent in pandas/openpyxl calls.
+
+MAX_COMPARE_JOBS = 4  # concurrent compares per server process
+MAX_STAGE_WORKERS = MAX_COMPARE_JOBS * 2
+
+# Separate pools so a job waiting on its stages can never starve them
+_job_pool = ThreadPoolExecutor(max_workers=MAX_COMPARE_JOBS, thread_name_prefix='compare-job')
+_stage_pool = ThreadPoolExecutor(max_workers=MAX_STAGE_WORKERS, thread_name_prefix='compare-stage')
+
+# Submits to the stage pool with the job's tracing context set in the worker thread
+class _StageExecutor:
+    def __init__(self, context):
+        self.context = context
+
+    def submit(self, func, *args, **kwargs):
+        def run():
+            set_context(**self.context)
+            return func(*args, **kwargs)
+        return _stage_pool.submit(run)
+
+class CompareJob:
+    STAGES = ('applicant', 'matches', 'potentials')
+
+    def __init__(self, applicant, master_path, accounts_path, blacklist, context=None, cache=None):
+        self.context = context or {}
+        self.cache = cache
+        self.applicant_frame = None  # parsed applicant file, if the compare had to read it
+        self.warnings = []
+        self.started = time.time()
+        self.finished = None
+        self._progress = {stage: {'done': False} for stage in self.STAGES}
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self.future = _job_pool.submit(self._run, applicant, master_path, accounts_path, blacklist)
+
+    def _run(self, applicant, master_path, accounts_path, blacklist):
+        set_context(**self.context)
+        try:
+            return run_comparisons(
+                applicant, master_path, accounts_path, blacklist,
+                warn=self.warnings.append, executor=_StageExecutor(self.context),
+                progress=self._update, cancelled=self._cancel.is_set, cache=self.cache,
+                on_applicant=self._keep_applicant,
+            )
+        finally:
+            self.finished = time.time()
+
+    def _keep_applicant(self, df):
+        self.applicant_frame = df
+
+    def _update(self, stage, **fields):
+        with self._lock:
+            self._progress.setdefault(stage, {}).update(fields)
+
+    # Copy of the per-stage progress, e.g. {'matches': {'rows': 52000, 'matches': 310, 'done': False}}
+    def progress(self):
+        with self._lock:
+            return {stage: dict(fields) for stage, fields in self._progress.items()}
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def done(self):
+        return self.future.done()
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.time()) - self.started
+
+    # (common_all, error, mr_potentials, mr_error); raises CompareCancelled if cancelled
+    def result(self):
+        return self.future.result()
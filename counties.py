@@ -0,0 +1,46 @@
+# Wyoming counties list
+WY_COUNTIES = [
+    "Albany", "Big Horn", "Campbell", "Carbon", "Converse", "Crook", "Fremont", "Goshen",
+    "Hot Springs", "Johnson", "Laramie", "Lincoln", "Natrona", "Niobrara", "Park", "Platte",
+    "Sheridan", "Sublette", "Sweetwater", "Teton", "Uinta", "Washakie", "Weston"
+]
+
+# Subdomain to county mapping (based on slugs from county-landing.html)
+SUBDOMAIN_TO_COUNTY = {
+    'albany': 'Albany',
+    'big-horn': 'Big Horn',
+    'campbell': 'Campbell',
+    'carbon': 'Carbon',
+    'converse': 'Converse',
+    'crook': 'Crook',
+    'fremont': 'Fremont',
+    'goshen': 'Goshen',
+    'hot-springs': 'Hot Springs',
+    'johnson': 'Johnson',
+    'laramie': 'Laramie',
+    'lincoln': 'Lincoln',
+    'natrona': 'Natrona',
+    'niobrara': 'Niobrara',
+    'park': 'Park',
+    'platte': 'Platte',
+    'sheridan': 'Sheridan',
+    'sublette': 'Sublette',
+    'sweetwater': 'Sweetwater',
+    'teton': 'Teton',
+    'uinta': 'Uinta',
+    'washakie': 'Washakie',
+    'weston': 'Weston'
+}
+
+# Subdomain of a request host, e.g. "big-horn.assessortools.com:443" -> "big-horn"
+def subdomain_from_host(host):
+    return (host or '').split(':')[0].split('.')[0].strip().lower()
+
+# County for a request, from the subdomain nginx passes as X-County-Subdomain (captured by its
+# server_name regex) or, for direct access, from the Host header. Returns (county, subdomain);
+# county is None when the subdomain is not a county slug.
+def county_from_headers(headers):
+    subdomain = (headers.get('X-County-Subdomain') or '').strip().lower()
+    if not subdomain:
+        subdomain = subdomain_from_host(headers.get('X-Forwarded-Host') or headers.get('Host'))
+    return SUBDOMAIN_TO_COUNTY.get(subdomain), subdomain
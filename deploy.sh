@@ -1,4 +1,8 @@
 #!/bin/bash
 git pull origin main
 sudo cp public/index.html /var/www/html/index.html
-sudo systemctl reload nginx
\ No newline at end of file
+# Upstreams and the $subdomain -> worker maps the server blocks proxy to (see workers.py).
+# The committed file routes every county to the default processes; only install a sharded
+# rendering once `python workers.py status --shard all` shows every shard worker running.
+sudo cp public/county-shards.conf /etc/nginx/conf.d/county-shards.conf
+sudo nginx -t && sudo systemctl reload nginx
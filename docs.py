@@ -1,81 +1,32 @@
 import streamlit as st
-import streamlit_javascript as st_js  # New import for JS detection
-import pandas as pd
 import os
-import re
-import io
-import fitz  # PyMuPDF
-import json
-import time
-from datetime import datetime
-import base64
-import urllib.parse
-from streamlit_pdf_viewer import pdf_viewer
-import streamlit.components.v1 as components
-from typing import Optional
-
-# Wyoming counties list
-WY_COUNTIES = [
-    "Albany", "Big Horn", "Campbell", "Carbon", "Converse", "Crook", "Fremont", "Goshen",
-    "Hot Springs", "Johnson", "Laramie", "Lincoln", "Natrona", "Niobrara", "Park", "Platte",
-    "Sheridan", "Sublette", "Sweetwater", "Teton", "Uinta", "Washakie", "Weston"
-]
-
-# Subdomain to county mapping (based on slugs from county-landing.html)
-SUBDOMAIN_TO_COUNTY = {
-    'albany': 'Albany',
-    'big-horn': 'Big Horn',
-    'campbell': 'Campbell',
-    'carbon': 'Carbon',
-    'converse': 'Converse',
-    'crook': 'Crook',
-    'fremont': 'Fremont',
-    'goshen': 'Goshen',
-    'hot-springs': 'Hot Springs',
-    'johnson': 'Johnson',
-    'laramie': 'Laramie',
-    'lincoln': 'Lincoln',
-    'natrona': 'Natrona',
-    'niobrara': 'Niobrara',
-    'park': 'Park',
-    'platte': 'Platte',
-    'sheridan': 'Sheridan',
-    'sublette': 'Sublette',
-    'sweetwater': 'Sweetwater',
-    'teton': 'Teton',
-    'uinta': 'Uinta',
-    'washakie': 'Washakie',
-    'weston': 'Weston'
-}
-
-# Detect subdomain via JS and set county (no cache - called once per run)
-def detect_county():
-    try:
-        # JS expression to get subdomain (first part of hostname) - no 'return' needed
-        subdomain = st_js.st_javascript("window.location.hostname.split('.')[0]")
-        county = SUBDOMAIN_TO_COUNTY.get(subdomain.lower(), WY_COUNTIES[0])
-        if subdomain.lower() not in SUBDOMAIN_TO_COUNTY:
-            st.warning(f"Subdomain '{subdomain}' not recognized; defaulting to '{county}'.")
-        return county
-    except:
-        # Fallback if JS fails
-        return ""#WY_COUNTIES[0]
-
-county = detect_county()
-
-# Early session state init for county (avoids flash)
-if 'detected_county' not in st.session_state:
-    st.session_state.detected_county = None
+import threading
+from counties import WY_COUNTIES, county_from_headers
+from storage import save_upload, file_lock, atomic_write_json, read_json
+from manifest import (
+    WATCH_ENABLED, get_manifest, record_file, record_index, get_file_entry, has_file,
+    is_index_current, start_watcher,
+)
+from prefs import save_user_pref, session_token
+from docs_engine import build_index, search_matches, extract_pdf
+from tracing import annotate, traced, size_of, set_context, get_spans, clear_spans, summarize, to_jsonl, export_jsonl
+from metrics import (
+    start_metrics_server, record_cache, SEARCHES, SEARCH_SECONDS, EXTRACTS, EXTRACT_SECONDS,
+    INDEX_JOBS, INDEX_SECONDS,
+)
 
-# Detect and store county
-if st.session_state.detected_county is None:
-    st.session_state.detected_county = detect_county()
-    st.rerun()  # Immediate rerun to apply county-specific title/config
+start_metrics_server(os.path.splitext(os.path.basename(__file__))[0])
 
-# county = st.session_state.detected_county
+# County comes from the request headers (see counties.county_from_headers), resolved once per
+# session without a browser round trip, so the first script run can render the page
+if 'detected_county' not in st.session_state:
+    st.session_state.detected_county = county_from_headers(st.context.headers)
+detected_county, subdomain = st.session_state.detected_county
+county = detected_county or WY_COUNTIES[0]
 
-# Now set county-specific title/config on rerun (overrides placeholder)
 st.set_page_config(page_title=f"Document Search Tool - {county} County", layout="wide")
+if detected_county is None:
+    st.warning(f"Subdomain '{subdomain}' not recognized; defaulting to '{county}'.")
 st.title(f"{county} Document Search Tool")
 
 # Document types
@@ -83,224 +34,85 @@ DOC_TYPES = ["Notice of Value", "Declaration", "Tax Notice"]
 
 # Base directory for county data
 BASE_DIR = "county_docs"
-os.makedirs(BASE_DIR, exist_ok=True)
 
-def get_file_status(county_dir, doc_type, extension):
-    file_path = get_doc_path(county_dir, doc_type, extension)
-    if os.path.exists(file_path):
-        size_mb = os.path.getsize(file_path) / (1024 * 1024)  # MB
-        return f"✅ Exists ({size_mb:.1f} MB): {os.path.basename(file_path)}"
+def get_doc_name(doc_type, extension):
+    return f"{doc_type.replace(' ', '_').lower()}.{extension}"
+
+# Status line from the county manifest (no filesystem access)
+def get_file_status(manifest, doc_type, extension):
+    entry = get_file_entry(manifest, get_doc_name(doc_type, extension))
+    if entry:
+        size_mb = entry['size'] / (1024 * 1024)  # MB
+        return f"✅ Exists ({size_mb:.1f} MB): {get_doc_name(doc_type, extension)}"
     return f"❌ Missing: {doc_type}.{extension}"
 
+# Created once per process and county instead of on every rerun
+@st.cache_resource(show_spinner=False)
 def get_county_path(county):
     county_dir = os.path.join(BASE_DIR, county.replace(" ", "_"))
     os.makedirs(county_dir, exist_ok=True)
     return county_dir
 
 def get_doc_path(county_dir, doc_type, extension):
-    return os.path.join(county_dir, f"{doc_type.replace(' ', '_').lower()}.{extension}")
-
-def extract_nov_info(text):
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
-    account = ""
-    local_number = ""
-
-    normalized_lines = [re.sub(r'\s+', ' ', line).strip() for line in lines]
-
-    account_pattern = re.compile(r'[RMPO]000\d{4,5}', re.I)
-    account_index = -1
-    for i, line in enumerate(normalized_lines):
-        match = account_pattern.search(line)
-        if match:
-            account = match.group().upper()
-            account_index = i
-            break
-
-    if account_index != -1 and account_index + 1 < len(normalized_lines):
-        local_number_candidate = normalized_lines[account_index + 1].strip()
-        if re.match(r'^\d{4,6}$', local_number_candidate):
-            local_number = local_number_candidate.lstrip('0').zfill(4)
-
-    return account, local_number
-
-def extract_declaration_info(text):
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
-    account = ""
-    local_number = ""
-
-    acc_pattern = re.compile(r'[RMPO]000\d{4,5}', re.I)
-    for line in lines:
-        acc_match = acc_pattern.search(line)
-        if acc_match:
-            account = acc_match.group().upper()
-            break
-
-    for i, line in enumerate(lines):
-        if "January 1, 2025" in line:
-            if i + 1 < len(lines) and re.match(r'^\d{4}$', lines[i + 1]):
-                local_number = lines[i + 1]
-                break
-
-    return account, local_number
-
-def extract_tax_notice_info(text):
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
-    account = ""
-    local_number = ""
-
-    for line in lines:
-        if "LOCAL/REALWARE ID #" in line:
-            id_match = re.search(r'LOCAL/REALWARE ID #\s*(\d+)/([RMPO]000\d{4,5})', line, re.I)
-            if id_match:
-                local_number = id_match.group(1).lstrip('0').zfill(4)
-                account = id_match.group(2).upper()
-            break
-
-    return account, local_number
-
-def extract_info_from_text(text, search_type):
-    if search_type == "Notice of Value":
-        return extract_nov_info(text)
-    elif search_type == "Declaration":
-        return extract_declaration_info(text)
-    elif search_type == "Tax Notice":
-        return extract_tax_notice_info(text)
-    return "", ""
-
-@st.cache_data
-def index_pdf(pdf_path, excel_path, search_type):
-    index_data = {}
-    first_page = {}
-    debug_accounts = ["R0007425", "P0007419"]
-
-    excel_df = None
-    if pd is not None and excel_path and os.path.isfile(excel_path):
-        try:
-            excel_df = pd.read_excel(excel_path, engine='openpyxl')
-            required_columns = ['ACCOUNTNO', 'NAME1', 'BUSINESSNAME', 'PREDIRECTION', 'STREETNO', 'POSTDIRECTION', 'STREETNAME', 'STREETTYPE']
-            if all(col in excel_df.columns for col in required_columns):
-                excel_df.set_index('ACCOUNTNO', inplace=True)
-            else:
-                excel_df = None
-        except:
-            excel_df = None
-
-    try:
-        doc = fitz.open(pdf_path)
-        total_pages = len(doc)
-        for page_num in range(total_pages):
-            text = doc[page_num].get_text()
-            if not text:
-                continue
-            account, local_number = extract_info_from_text(text, search_type)
-            
-            if account in debug_accounts:
-                st.write(f"Debug for {account} on page {page_num + 1}")
-
-            if account:
-                ownership_name = ""
-                property_address = ""
-                business_name = ""
-                if excel_df is not None and account in excel_df.index:
-                    row = excel_df.loc[account]
-                    ownership_name = str(row.get('NAME1', '')) if pd.notna(row.get('NAME1')) else ""
-                    business_name = str(row.get('BUSINESSNAME', '')) if pd.notna(row.get('BUSINESSNAME')) else ""
-                    address_parts = [
-                        str(row.get('PREDIRECTION', '')) if pd.notna(row.get('PREDIRECTION')) else "",
-                        str(row.get('STREETNO', '')) if pd.notna(row.get('STREETNO')) else "",
-                        str(row.get('POSTDIRECTION', '')) if pd.notna(row.get('POSTDIRECTION')) else "",
-                        str(row.get('STREETNAME', '')) if pd.notna(row.get('STREETNAME')) else "",
-                        str(row.get('STREETTYPE', '')) if pd.notna(row.get('STREETTYPE')) else ""
-                    ]
-                    property_address = ' '.join(part for part in address_parts if part)
-                    excel_local_number = str(row.get('Local Number', '')) if pd.notna(row.get('Local Number')) else ""
-                    if excel_local_number and re.match(r'^\d{4,6}$', excel_local_number):
-                        local_number = excel_local_number.lstrip('0').zfill(4)
-
-                if account not in index_data:
-                    index_data[account] = {
-                        "local_number": local_number,
-                        "business_name": business_name,
-                        "address": property_address,
-                        "ownership_name": ownership_name,
-                        "pages": [page_num + 1]
-                    }
-                    first_page[account] = page_num + 1
-                else:
-                    index_data[account]["pages"].append(page_num + 1)
-                    if page_num + 1 == first_page[account]:
-                        if not index_data[account]["business_name"] and business_name:
-                            index_data[account]["business_name"] = business_name
-                        if not index_data[account]["address"] and property_address:
-                            index_data[account]["address"] = property_address
-                        if not index_data[account]["ownership_name"] and ownership_name:
-                            index_data[account]["ownership_name"] = ownership_name
-        doc.close()
-    except Exception as e:
-        st.error(f"Error indexing: {str(e)}")
-    return index_data
+    return os.path.join(county_dir, get_doc_name(doc_type, extension))
+
+# One manifest watcher per process and county directory (MANIFEST_WATCH=1, needs watchdog)
+@st.cache_resource(show_spinner=False)
+def watch_county_dir(county_dir):
+    return start_watcher(county_dir)
+
+# Size + mtime of a file, used as the cache key for index_pdf so a replaced file is re-read
+def get_file_fingerprint(file_path):
+    if not file_path or not os.path.isfile(file_path):
+        return None
+    stat = os.stat(file_path)
+    return (stat.st_size, stat.st_mtime_ns)
+
+# Cached indexes are bounded: each entry holds a full index dict in memory
+INDEX_CACHE_TTL = 60 * 60  # seconds
+INDEX_CACHE_MAX_ENTRIES = 8
+
+# Indexes built by this thread (each session's script runs in its own thread). build_index is
+# only reached on an index_pdf cache miss, so a call that leaves the count unchanged was a hit.
+_index_builds = threading.local()
+
+def counted_build_index(*args, **kwargs):
+    _index_builds.count = index_builds() + 1
+    return build_index(*args, **kwargs)
+
+def index_builds():
+    return getattr(_index_builds, 'count', 0)
+
+# pdf_fingerprint/excel_fingerprint are only part of the cache key (see get_file_fingerprint).
+# Settings clears the one entry built from a file it replaces (see index_args); other counties'
+# and document types' indexes stay cached.
+@st.cache_data(ttl=INDEX_CACHE_TTL, max_entries=INDEX_CACHE_MAX_ENTRIES, show_spinner=False)
+def index_pdf(pdf_path, excel_path, search_type, pdf_fingerprint=None, excel_fingerprint=None):
+    return counted_build_index(pdf_path, excel_path, search_type, warn=st.error, debug=st.write)
+
+# (args, kwargs) index_pdf is called with for a document type's current files; also what
+# index_pdf.clear() needs to drop exactly that entry
+def index_args(manifest, county_dir, doc_type):
+    pdf_path = get_doc_path(county_dir, doc_type, "pdf")
+    excel_path = get_doc_path(county_dir, doc_type, "xlsx") if has_file(manifest, get_doc_name(doc_type, "xlsx")) else None
+    fingerprints = {
+        'pdf_fingerprint': get_file_fingerprint(pdf_path),
+        'excel_fingerprint': get_file_fingerprint(excel_path),
+    }
+    return (pdf_path, excel_path, doc_type), fingerprints
 
 def save_index(county_dir, search_type, index_data):
     index_file = get_doc_path(county_dir, search_type, "json")
-    with open(index_file, 'w', encoding='utf-8') as f:
-        json.dump(index_data, f, indent=4)
+    with file_lock(index_file):
+        atomic_write_json(index_file, index_data, indent=4)
 
+@traced()
 def load_index(county_dir, search_type):
     index_file = get_doc_path(county_dir, search_type, "json")
-    if os.path.exists(index_file):
-        with open(index_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
-
-def search_matches(index_data, query, search_type):
-    query_lower = query.lower().strip()
-    results = []
-
-    # Exact account match
-    if re.match(r'^[RMPO]000\d{4,5}$', query, re.I):
-        q_upper = query.upper()
-        if q_upper in index_data:
-            data = index_data[q_upper]
-            results.append({
-                'acc': q_upper,
-                'local_number': data.get("local_number", "").lstrip('0'),
-                'ownership_name': data.get("ownership_name", ""),
-                'address': data.get("address", ""),
-                'business_name': data.get("business_name", ""),
-                'pages': data['pages']
-            })
-    # Exact local number match
-    elif re.match(r'^\d{4,}$', query):
-        normalized_query = query.lstrip('0')
-        for acc, data in index_data.items():
-            local_number = data.get("local_number", "").lstrip('0')
-            if normalized_query == local_number:
-                results.append({
-                    'acc': acc,
-                    'local_number': local_number,
-                    'ownership_name': data.get("ownership_name", ""),
-                    'address': data.get("address", ""),
-                    'business_name': data.get("business_name", ""),
-                    'pages': data['pages']
-                })
-    # Partial name/address match
-    else:
-        for acc, data in index_data.items():
-            ownership_name = data.get("ownership_name", "").lower()
-            business_name = data.get("business_name", "").lower()
-            address = data.get("address", "").lower()
-            if (query_lower in ownership_name or 
-                query_lower in business_name or 
-                query_lower in address):
-                results.append({
-                    'acc': acc,
-                    'local_number': data.get("local_number", "").lstrip('0'),
-                    'ownership_name': data.get("ownership_name", ""),
-                    'address': data.get("address", ""),
-                    'business_name': data.get("business_name", ""),
-                    'pages': data['pages']
-                })
-    return results
+    annotate(bytes=size_of(index_file))
+    index_data = read_json(index_file, {})
+    annotate(accounts=len(index_data))
+    return index_data
 
 def get_business_name(res):
     return res.get('business_name', '') or 'N/A'
@@ -311,51 +123,14 @@ def get_ownership_name(res):
 def get_address_from_index(res):
     return res.get('address', '') or 'N/A'
 
-def extract_pdf(pdf_path, selected_res):
-    try:
-        doc = fitz.open(pdf_path)
-        pages = selected_res['pages']
-        output = fitz.open()
-        for page_num in sorted(pages):
-            page = doc[page_num - 1]  # 1-based to 0-based
-            output.insert_pdf(doc, from_page=page.number, to_page=page.number)
-        doc.close()
-        output_bytes = io.BytesIO()
-        output.save(output_bytes, garbage=4, deflate=True, clean=True)
-        output.close()
-        return output_bytes
-    except Exception as e:
-        return (None, f"Error extracting PDF: {str(e)}")
-
-# User preference functions (server-side persistence)
-def get_user_prefs_path():
-    username = os.environ.get('REMOTE_USER', 'anonymous').strip().replace(' ', '_')
-    prefs_dir = 'user_prefs'
-    os.makedirs(prefs_dir, exist_ok=True)
-    return os.path.join(prefs_dir, f"{username}_prefs.json")
-
-def load_user_pref(key: str, default=None):
-    prefs_path = get_user_prefs_path()
-    if os.path.exists(prefs_path):
-        with open(prefs_path, 'r') as f:
-            prefs = json.load(f)
-            return prefs.get(key, default)
-    return default
-
-def save_user_pref(key: str, value):
-    prefs_path = get_user_prefs_path()
-    prefs = {}
-    if os.path.exists(prefs_path):
-        with open(prefs_path, 'r') as f:
-            prefs = json.load(f)
-    prefs[key] = value
-    with open(prefs_path, 'w') as f:
-        json.dump(prefs, f)
+set_context(app='docs', county=county)
 
 # Auto-set session state for county
 if 'last_county' not in st.session_state:
     st.session_state.last_county = county
-save_user_pref('last_county', county)  # Persist for fallback
+if 'prefs_token' not in st.session_state:
+    st.session_state.prefs_token = session_token()  # Flushes prefs when the session ends
+save_user_pref('last_county', county)  # Persist for fallback (written only when it changes)
 
 # Back to Home button (to subdomain index.html)
 st.markdown(
@@ -394,6 +169,8 @@ st.markdown(
 # Initialize session state
 if 'docs_indexed' not in st.session_state:
     st.session_state.docs_indexed = {}
+if 'saved_upload_ids' not in st.session_state:
+    st.session_state.saved_upload_ids = {}  # Uploader key -> file_id of the upload already saved
 if 'search_results' not in st.session_state:
     st.session_state.search_results = None
 if 'selected_res' not in st.session_state:
@@ -408,18 +185,14 @@ county_dir = get_county_path(county)
 with st.sidebar:
     st.write(f"**Current County:** {county}")
 
-# Auto-load indexed status from disk
-if county and county_dir:
-    for doc_type in DOC_TYPES:
-        index_file = get_doc_path(county_dir, doc_type, "json")
-        if doc_type not in st.session_state.docs_indexed:
-            st.session_state.docs_indexed[doc_type] = os.path.exists(index_file)
+# File and index status come from the county manifest, held in memory between reruns
+if WATCH_ENABLED:
+    watch_county_dir(county_dir)
+manifest = get_manifest(county_dir, {doc_type: get_doc_name(doc_type, "json") for doc_type in DOC_TYPES})
 
-# Refresh indexed status if needed
-if county and county_dir:
-    for doc_type in DOC_TYPES:
-        index_file = get_doc_path(county_dir, doc_type, "json")
-        st.session_state.docs_indexed[doc_type] = os.path.exists(index_file)
+# An index counts only if it was built from the PDF/Excel currently stored
+for doc_type in DOC_TYPES:
+    st.session_state.docs_indexed[doc_type] = is_index_current(manifest, doc_type)
 
 # Sidebar: Instructions & Reset (with collapsible content and protected clear button)
 with st.sidebar:
@@ -451,6 +224,22 @@ with st.sidebar:
                 st.error("Incorrect password. Try again.")
                 st.session_state.clear_password = ""  # Clear input on error
 
+# Sidebar: hot-path timings recorded by tracing.py (spans from every session in this process)
+with st.sidebar:
+    with st.expander("Performance Trace (admin)", expanded=False):
+        spans = get_spans()
+        if spans:
+            st.dataframe(summarize(spans), hide_index=True)
+            st.dataframe(spans[::-1][:50], hide_index=True)
+            st.download_button("Download Spans (JSONL)", data=to_jsonl(spans), file_name="docs_spans.jsonl", mime="application/jsonl")
+            if st.button("Append to traces/docs_spans.jsonl"):
+                st.success(f"Exported {export_jsonl('traces/docs_spans.jsonl')} spans.")
+            if st.button("Clear Spans"):
+                clear_spans()
+                st.rerun()
+        else:
+            st.info("No spans recorded yet.")
+
 # Tabs
 tab1, tab2 = st.tabs(["Search", "Settings"])
 
@@ -465,13 +254,15 @@ with tab1:
 
         # Define pdf_path here so it's always available (uses current type_var)
         pdf_path = get_doc_path(county_dir, type_var, "pdf")
-        if not os.path.exists(pdf_path):
+        if not has_file(manifest, get_doc_name(type_var, "pdf")):
             st.warning("PDF not found. Please upload in Settings.")
 
         if submitted:
             index_data = load_index(county_dir, type_var)
             with st.spinner("Searching..."):
-                results = search_matches(index_data, query, type_var)
+                with SEARCH_SECONDS.time(county=county, doc_type=type_var):
+                    results = search_matches(index_data, query, type_var)
+                SEARCHES.inc(county=county, doc_type=type_var, status='ok' if results else 'no_match')
                 if not results:
                     st.error("No matches found.")
                     st.session_state.search_results = None
@@ -506,7 +297,9 @@ with tab1:
 
             # Extract and download button (single button, inside the if)
             if st.button("Extract Selected PDF", key="extract_pdf"):
-                pdf_bytes = extract_pdf(pdf_path, selected_res)
+                with EXTRACT_SECONDS.time(county=county, doc_type=type_var):
+                    pdf_bytes = extract_pdf(pdf_path, selected_res)
+                EXTRACTS.inc(county=county, doc_type=type_var, status='error' if isinstance(pdf_bytes, tuple) else 'ok')
                 if isinstance(pdf_bytes, tuple):  # Error case
                     st.error(pdf_bytes[1])
                 else:
@@ -520,7 +313,9 @@ with tab1:
 
                     # Inline PDF Viewer with dynamic height
                     st.markdown("### Full PDF Preview:")
+                    import fitz  # PyMuPDF; imported on first preview, not at session start
                     try:
+                        from streamlit_pdf_viewer import pdf_viewer
                         # Calc total height to fit content (no inner scroll)
                         doc = fitz.open(stream=pdf_data, filetype="pdf")
                         target_width = 800  # px; adjust for your layout
@@ -561,25 +356,34 @@ with tab2:
                 st.write(f"**{doc_type}**")
                 
                 # PDF Status and Replace
-                pdf_status = get_file_status(county_dir, doc_type, "pdf")
+                pdf_status = get_file_status(manifest, doc_type, "pdf")
                 st.write(f"**PDF:** {pdf_status}")
-                uploaded_pdf = st.file_uploader(f"Replace {doc_type} PDF", type=['pdf'], key=f"{doc_type.replace(' ', '_').lower()}_pdf_replace_{county}")
-                if uploaded_pdf is not None:
+                pdf_upload_key = f"{doc_type.replace(' ', '_').lower()}_pdf_replace_{county}"
+                uploaded_pdf = st.file_uploader(f"Replace {doc_type} PDF", type=['pdf'], key=pdf_upload_key)
+                # The uploader keeps its file across reruns; save each upload once
+                if uploaded_pdf is not None and uploaded_pdf.file_id != st.session_state.saved_upload_ids.get(pdf_upload_key):
                     pdf_path = get_doc_path(county_dir, doc_type, "pdf")
-                    with open(pdf_path, "wb") as f:
-                        f.write(uploaded_pdf.getbuffer())
+                    old_args, old_fingerprints = index_args(manifest, county_dir, doc_type)
+                    save_upload(uploaded_pdf, pdf_path)
+                    record_file(county_dir, get_doc_name(doc_type, "pdf"))
+                    index_pdf.clear(*old_args, **old_fingerprints)  # Only the index built from the old file
+                    st.session_state.saved_upload_ids[pdf_upload_key] = uploaded_pdf.file_id
                     st.success(f"{doc_type} PDF replaced!")
                     st.session_state.docs_indexed[doc_type] = False  # Mark as needs re-index
                     st.rerun()
                 
                 # Excel Status and Replace
-                excel_status = get_file_status(county_dir, doc_type, "xlsx")
+                excel_status = get_file_status(manifest, doc_type, "xlsx")
                 st.write(f"**Excel:** {excel_status}")
-                uploaded_excel = st.file_uploader(f"Replace {doc_type} Excel", type=['xlsx', 'xls'], key=f"{doc_type.replace(' ', '_').lower()}_excel_replace_{county}")
-                if uploaded_excel is not None:
+                excel_upload_key = f"{doc_type.replace(' ', '_').lower()}_excel_replace_{county}"
+                uploaded_excel = st.file_uploader(f"Replace {doc_type} Excel", type=['xlsx', 'xlsb', 'xls', 'csv'], key=excel_upload_key)
+                if uploaded_excel is not None and uploaded_excel.file_id != st.session_state.saved_upload_ids.get(excel_upload_key):
                     excel_path = get_doc_path(county_dir, doc_type, "xlsx")
-                    with open(excel_path, "wb") as f:
-                        f.write(uploaded_excel.getbuffer())
+                    old_args, old_fingerprints = index_args(manifest, county_dir, doc_type)
+                    save_upload(uploaded_excel, excel_path)
+                    record_file(county_dir, get_doc_name(doc_type, "xlsx"))
+                    index_pdf.clear(*old_args, **old_fingerprints)  # Only the index built from the old file
+                    st.session_state.saved_upload_ids[excel_upload_key] = uploaded_excel.file_id
                     st.success(f"{doc_type} Excel replaced!")
                     st.session_state.docs_indexed[doc_type] = False  # Mark as needs re-index
                     st.rerun()
@@ -587,12 +391,20 @@ with tab2:
                 # Index/Re-Index Button
                 index_text = "Re-Index" if st.session_state.docs_indexed.get(doc_type, False) else "Index"
                 if st.button(f"{index_text} {doc_type}", key=f"index_{doc_type}_{county}"):
-                    pdf_path = get_doc_path(county_dir, doc_type, "pdf")
-                    excel_path = get_doc_path(county_dir, doc_type, "xlsx")
-                    if os.path.exists(pdf_path):
+                    if has_file(manifest, get_doc_name(doc_type, "pdf")):
                         with st.spinner(f"Indexing {doc_type}..."):
-                            index_data = index_pdf(pdf_path, excel_path if os.path.exists(excel_path) else None, doc_type)
+                            args, fingerprints = index_args(manifest, county_dir, doc_type)
+                            builds_before = index_builds()
+                            with INDEX_SECONDS.time(county=county, doc_type=doc_type):
+                                index_data = index_pdf(*args, **fingerprints)
+                            INDEX_JOBS.inc(county=county, doc_type=doc_type, status='ok' if index_data else 'empty')
+                            record_cache('pdf_index', index_builds() == builds_before, county=county)
                             save_index(county_dir, doc_type, index_data)
+                            record_index(
+                                county_dir, doc_type, get_doc_name(doc_type, "json"),
+                                [get_doc_name(doc_type, "pdf"), get_doc_name(doc_type, "xlsx")],
+                                accounts=len(index_data),
+                            )
                             st.session_state.docs_indexed[doc_type] = True
                             st.success(f"{doc_type} indexed successfully!")
                             st.rerun()
@@ -602,6 +414,11 @@ with tab2:
     # Check indexing status
     st.subheader("Indexing Status")
     for doc_type in DOC_TYPES:
-        index_file = get_doc_path(county_dir, doc_type, "json")
-        status = "✅ Indexed" if os.path.exists(index_file) else "❌ Not Indexed"
+        index = manifest['indexes'].get(doc_type)
+        if st.session_state.docs_indexed[doc_type]:
+            status = f"✅ Indexed (v{index['index_version']}, {index.get('accounts', '?')} accounts, {index['updated']})"
+        elif index is not None:
+            status = "⚠️ Out of date (PDF or Excel replaced since indexing)"
+        else:
+            status = "❌ Not Indexed"
         st.write(f"{doc_type}: {status}")
\ No newline at end of file
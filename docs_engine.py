@@ -0,0 +1,236 @@
+import os
+import re
+import io
+import time
+from tracing import span, annotate, traced, size_of
+
+# Document search engine: page text parsing, PDF indexing, search and page extraction.
+# Shared by the docs apps and the benchmarks; nothing here depends on Streamlit, callers pass
+# warn=/debug= to surface messages. PyMuPDF and pandas are imported inside the functions that
+# need them, so importing this module (every docs session start) stays cheap.
+
+DEBUG_ACCOUNTS = ["R0007425", "P0007419"]
+
+def _no_warn(message):
+    pass
+
+def extract_nov_info(text):
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    account = ""
+    local_number = ""
+
+    normalized_lines = [re.sub(r'\s+', ' ', line).strip() for line in lines]
+
+    account_pattern = re.compile(r'[RMPO]000\d{4,5}', re.I)
+    account_index = -1
+    for i, line in enumerate(normalized_lines):
+        match = account_pattern.search(line)
+        if match:
+            account = match.group().upper()
+            account_index = i
+            break
+
+    if account_index != -1 and account_index + 1 < len(normalized_lines):
+        local_number_candidate = normalized_lines[account_index + 1].strip()
+        if re.match(r'^\d{4,6}$', local_number_candidate):
+            local_number = local_number_candidate.lstrip('0').zfill(4)
+
+    return account, local_number
+
+def extract_declaration_info(text):
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    account = ""
+    local_number = ""
+
+    acc_pattern = re.compile(r'[RMPO]000\d{4,5}', re.I)
+    for line in lines:
+        acc_match = acc_pattern.search(line)
+        if acc_match:
+            account = acc_match.group().upper()
+            break
+
+    for i, line in enumerate(lines):
+        if "January 1, 2025" in line:
+            if i + 1 < len(lines) and re.match(r'^\d{4}$', lines[i + 1]):
+                local_number = lines[i + 1]
+                break
+
+    return account, local_number
+
+def extract_tax_notice_info(text):
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    account = ""
+    local_number = ""
+
+    for line in lines:
+        if "LOCAL/REALWARE ID #" in line:
+            id_match = re.search(r'LOCAL/REALWARE ID #\s*(\d+)/([RMPO]000\d{4,5})', line, re.I)
+            if id_match:
+                local_number = id_match.group(1).lstrip('0').zfill(4)
+                account = id_match.group(2).upper()
+            break
+
+    return account, local_number
+
+def extract_info_from_text(text, search_type):
+    if search_type == "Notice of Value":
+        return extract_nov_info(text)
+    elif search_type == "Declaration":
+        return extract_declaration_info(text)
+    elif search_type == "Tax Notice":
+        return extract_tax_notice_info(text)
+    return "", ""
+
+# Map each account found in the PDF to its pages, enriched from the county's Excel export
+@traced()
+def build_index(pdf_path, excel_path, search_type, warn=_no_warn, debug=_no_warn, debug_accounts=DEBUG_ACCOUNTS):
+    import fitz  # PyMuPDF
+    import pandas as pd
+    from loaders import read_table
+    index_data = {}
+    first_page = {}
+
+    excel_df = None
+    if excel_path and os.path.isfile(excel_path):
+        try:
+            with span('read_excel', bytes=size_of(excel_path)):
+                excel_df = read_table(excel_path)
+                annotate(rows=len(excel_df))
+            required_columns = ['ACCOUNTNO', 'NAME1', 'BUSINESSNAME', 'PREDIRECTION', 'STREETNO', 'POSTDIRECTION', 'STREETNAME', 'STREETTYPE']
+            if all(col in excel_df.columns for col in required_columns):
+                excel_df.set_index('ACCOUNTNO', inplace=True)
+            else:
+                excel_df = None
+        except:
+            excel_df = None
+
+    try:
+        doc = fitz.open(pdf_path)
+        total_pages = len(doc)
+        annotate(pages=total_pages, bytes=size_of(pdf_path), search_type=search_type)
+        text_seconds = 0.0
+        for page_num in range(total_pages):
+            text_start = time.perf_counter()
+            text = doc[page_num].get_text()
+            text_seconds += time.perf_counter() - text_start
+            if not text:
+                continue
+            account, local_number = extract_info_from_text(text, search_type)
+            
+            if account in debug_accounts:
+                debug(f"Debug for {account} on page {page_num + 1}")
+
+            if account:
+                ownership_name = ""
+                property_address = ""
+                business_name = ""
+                if excel_df is not None and account in excel_df.index:
+                    row = excel_df.loc[account]
+                    ownership_name = str(row.get('NAME1', '')) if pd.notna(row.get('NAME1')) else ""
+                    business_name = str(row.get('BUSINESSNAME', '')) if pd.notna(row.get('BUSINESSNAME')) else ""
+                    address_parts = [
+                        str(row.get('PREDIRECTION', '')) if pd.notna(row.get('PREDIRECTION')) else "",
+                        str(row.get('STREETNO', '')) if pd.notna(row.get('STREETNO')) else "",
+                        str(row.get('POSTDIRECTION', '')) if pd.notna(row.get('POSTDIRECTION')) else "",
+                        str(row.get('STREETNAME', '')) if pd.notna(row.get('STREETNAME')) else "",
+                        str(row.get('STREETTYPE', '')) if pd.notna(row.get('STREETTYPE')) else ""
+                    ]
+                    property_address = ' '.join(part for part in address_parts if part)
+                    excel_local_number = str(row.get('Local Number', '')) if pd.notna(row.get('Local Number')) else ""
+                    if excel_local_number and re.match(r'^\d{4,6}$', excel_local_number):
+                        local_number = excel_local_number.lstrip('0').zfill(4)
+
+                if account not in index_data:
+                    index_data[account] = {
+                        "local_number": local_number,
+                        "business_name": business_name,
+                        "address": property_address,
+                        "ownership_name": ownership_name,
+                        "pages": [page_num + 1]
+                    }
+                    first_page[account] = page_num + 1
+                else:
+                    index_data[account]["pages"].append(page_num + 1)
+                    if page_num + 1 == first_page[account]:
+                        if not index_data[account]["business_name"] and business_name:
+                            index_data[account]["business_name"] = business_name
+                        if not index_data[account]["address"] and property_address:
+                            index_data[account]["address"] = property_address
+                        if not index_data[account]["ownership_name"] and ownership_name:
+                            index_data[account]["ownership_name"] = ownership_name
+        doc.close()
+        annotate(text_extract_ms=round(text_seconds * 1000, 3), accounts=len(index_data))
+    except Exception as e:
+        warn(f"Error indexing: {str(e)}")
+    return index_data
+
+@traced()
+def search_matches(index_data, query, search_type):
+    query_lower = query.lower().strip()
+    results = []
+
+    # Exact account match
+    if re.match(r'^[RMPO]000\d{4,5}$', query, re.I):
+        q_upper = query.upper()
+        if q_upper in index_data:
+            data = index_data[q_upper]
+            results.append({
+                'acc': q_upper,
+                'local_number': data.get("local_number", "").lstrip('0'),
+                'ownership_name': data.get("ownership_name", ""),
+                'address': data.get("address", ""),
+                'business_name': data.get("business_name", ""),
+                'pages': data['pages']
+            })
+    # Exact local number match
+    elif re.match(r'^\d{4,}$', query):
+        normalized_query = query.lstrip('0')
+        for acc, data in index_data.items():
+            local_number = data.get("local_number", "").lstrip('0')
+            if normalized_query == local_number:
+                results.append({
+                    'acc': acc,
+                    'local_number': local_number,
+                    'ownership_name': data.get("ownership_name", ""),
+                    'address': data.get("address", ""),
+                    'business_name': data.get("business_name", ""),
+                    'pages': data['pages']
+                })
+    # Partial name/address match
+    else:
+        for acc, data in index_data.items():
+            ownership_name = data.get("ownership_name", "").lower()
+            business_name = data.get("business_name", "").lower()
+            address = data.get("address", "").lower()
+            if (query_lower in ownership_name or 
+                query_lower in business_name or 
+                query_lower in address):
+                results.append({
+                    'acc': acc,
+                    'local_number': data.get("local_number", "").lstrip('0'),
+                    'ownership_name': data.get("ownership_name", ""),
+                    'address': data.get("address", ""),
+                    'business_name': data.get("business_name", ""),
+                    'pages': data['pages']
+                })
+    annotate(accounts=len(index_data), results=len(results))
+    return results
+
+@traced()
+def extract_pdf(pdf_path, selected_res):
+    import fitz  # PyMuPDF
+    try:
+        doc = fitz.open(pdf_path)
+        pages = selected_res['pages']
+        output = fitz.open()
+        for page_num in sorted(pages):
+            page = doc[page_num - 1]  # 1-based to 0-based
+            output.insert_pdf(doc, from_page=page.number, to_page=page.number)
+        doc.close()
+        output_bytes = io.BytesIO()
+        output.save(output_bytes, garbage=4, deflate=True, clean=True)
+        output.close()
+        annotate(pages=len(pages), bytes=output_bytes.getbuffer().nbytes)
+        return output_bytes
+    except Exception as e:
+        return (None, f"Error extracting PDF: {str(e)}")
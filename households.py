@@ -0,0 +1,99 @@
+import re
+import pandas as pd
+from compare_engine import find_account_col, find_name_col, find_phone_col
+from addresses import parse_address
+
+# Applications that share a filer phone number or filer (mailing) address across different
+# accounts, i.e. one household filing for several properties. Each value is normalized once
+# and the rows are grouped in one hash pass (groupby), so the cost is linear in the number of
+# applications and a statewide file is fine.
+
+MIN_PHONE_DIGITS = 7
+
+CLUSTER_COLUMNS = ['Shared', 'Value', 'Accounts', 'Applications', 'Account Numbers', 'Names']
+
+def normalize_phone(value):
+    if value is None or pd.isna(value):
+        return ''
+    digits = re.sub(r'\D', '', str(value).removesuffix('.0'))
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    if len(digits) < MIN_PHONE_DIGITS or len(set(digits)) == 1:
+        return ''  # Missing or placeholder (0000000, 9999999999)
+    return digits
+
+def normalize_filer_address(value):
+    if value is None or pd.isna(value) or not str(value).strip():
+        return ''
+    return ' '.join(part for part in parse_address(value) if part)
+
+def _normalized(values, normalize):
+    seen = {}
+    keys = []
+    for value in values:
+        key = seen.get(value)
+        if key is None:
+            key = seen[value] = normalize(value)
+        keys.append(key)
+    return keys
+
+# {key: 'a, b, ...'} of the distinct non-empty values per key, in first-seen order
+def _join_by_key(rows, col):
+    joined = {}
+    distinct = rows[['key', col]].drop_duplicates()
+    for key, value in zip(distinct['key'].tolist(), distinct[col].tolist()):
+        if isinstance(value, str) and value:
+            joined.setdefault(key, []).append(value)
+    return {key: ', '.join(values) for key, values in joined.items()}
+
+# One row per phone number / filer address used by applications for at least min_accounts
+# different accounts, most accounts first. label_col (e.g. County on a statewide file) adds
+# its distinct values per cluster.
+def find_households(df, min_accounts=2, label_col=None):
+    columns = CLUSTER_COLUMNS + ([f"{label_col} List"] if label_col else [])
+    account_col = find_account_col(df) if df is not None else None
+    if not account_col:
+        return pd.DataFrame(columns=columns)
+    name_col = find_name_col(df, exclude=(account_col,))
+    sources = [
+        ('Phone', find_phone_col(df), normalize_phone),
+        ('Filer Address', next((col for col in df.columns if 'Filer Address' in str(col)), None), normalize_filer_address),
+    ]
+    # Rows without an account can't tell accounts apart, so they don't count towards a cluster
+    account_values = df[account_col].astype(object)
+    account_values = account_values.where(account_values.notna(), '').astype(str).str.strip()
+    has_account = (account_values != '').to_numpy()
+    clusters = []
+    for shared, col, normalize in sources:
+        if not col:
+            continue
+        rows = pd.DataFrame({
+            'key': _normalized(df[col].tolist(), normalize),
+            'account': account_values.to_numpy(),
+            'name': df[name_col].astype(object).to_numpy() if name_col else '',
+            'label': df[label_col].astype(object).to_numpy() if label_col else '',
+        })
+        rows = rows[(rows['key'] != '') & has_account]
+        grouped = rows.groupby('key', sort=False)
+        accounts = grouped['account'].nunique()
+        keys = accounts.index[accounts >= min_accounts]
+        if keys.empty:
+            continue
+        rows = rows[rows['key'].isin(keys)]
+        values = rows.groupby('key', sort=False).size()
+        result = pd.DataFrame({
+            'Shared': shared,
+            'Value': values.index,
+            'Accounts': accounts.reindex(values.index).to_numpy(),
+            'Applications': values.to_numpy(),
+        })
+        lists = {'Account Numbers': 'account', 'Names': 'name'}
+        if label_col:
+            lists[f"{label_col} List"] = 'label'
+        for column, source in lists.items():
+            result[column] = result['Value'].map(_join_by_key(rows, source)).fillna('')
+        clusters.append(result)
+    if not clusters:
+        return pd.DataFrame(columns=columns)
+    result = pd.concat(clusters, ignore_index=True)
+    return result.sort_values(['Accounts', 'Applications'], ascending=False, kind='stable').reset_index(drop=True)
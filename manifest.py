@@ -0,0 +1,213 @@
+import os
+import hashlib
+import threading
+import time
+from datetime import datetime
+from storage import update_json, read_json
+
+# Per-county status manifest (manifest.json in the county's directory) recording each stored
+# file's size, mtime and SHA-256 and each PDF index's version, source hashes and build time.
+# The upload and index paths update it, so the apps can show file and index status from memory
+# instead of stat-ing every file on every rerun (slow on network-mounted storage):
+#
+#   {"version": 1,
+#    "files":   {"master.xlsx": {"size": ..., "mtime": ..., "sha256": ..., "updated": ...}},
+#    "indexes": {"Notice of Value": {"file": "notice_of_value.json", "index_version": 3,
+#                                    "sources": {"notice_of_value.pdf": "<sha256>"}, ...}}}
+#
+# Manifests are cached per process. Without a watcher a cached manifest is re-read after
+# MANIFEST_TTL seconds, so changes made by another app process show up; with start_watcher
+# (needs the optional watchdog package) files changed outside the apps are re-recorded as soon
+# as they land and the cache is trusted until then.
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+MANIFEST_TTL = 30.0  # seconds
+WATCH_ENABLED = os.environ.get('MANIFEST_WATCH') == '1'  # apps start a watcher per county dir
+HASH_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+# Not tracked: the manifest itself, lock/quarantine files and in-flight temp files
+_IGNORED_PREFIXES = ('.upload-', '.tmp-')
+_IGNORED_SUFFIXES = ('.lock', '.corrupt')
+
+_cache = {}  # abs county dir -> (loaded_at, manifest)
+_cache_lock = threading.Lock()
+_watchers = {}  # abs county dir -> watchdog observer
+
+def get_manifest_path(county_dir):
+    return os.path.join(county_dir, MANIFEST_NAME)
+
+def is_tracked(file_name):
+    return (file_name != MANIFEST_NAME
+            and not file_name.startswith(_IGNORED_PREFIXES)
+            and not file_name.endswith(_IGNORED_SUFFIXES))
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+def _empty_manifest():
+    return {'version': MANIFEST_VERSION, 'files': {}, 'indexes': {}}
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Size, mtime and hash of a file, or None if it doesn't exist
+def describe_file(path):
+    try:
+        stat = os.stat(path)
+        sha256 = file_sha256(path)
+    except FileNotFoundError:
+        return None
+    return {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': sha256, 'updated': _now()}
+
+# Build a manifest from what is on disk; index entries of `previous` are kept while their
+# index file still exists, and index_files ({doc_type: index file name}) adds entries for
+# indexes built before the manifest existed. Used once per directory.
+def scan_manifest(county_dir, previous=None, index_files=None):
+    manifest = _empty_manifest()
+    try:
+        names = sorted(os.listdir(county_dir))
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        path = os.path.join(county_dir, name)
+        if is_tracked(name) and os.path.isfile(path):
+            entry = describe_file(path)
+            if entry:
+                manifest['files'][name] = entry
+    for doc_type, index in ((previous or {}).get('indexes') or {}).items():
+        if index.get('file') in manifest['files']:
+            manifest['indexes'][doc_type] = index
+    for doc_type, file_name in (index_files or {}).items():
+        if doc_type not in manifest['indexes'] and file_name in manifest['files']:
+            manifest['indexes'][doc_type] = {'file': file_name, 'index_version': 1, 'sources': {},
+                                             'updated': manifest['files'][file_name]['updated']}
+    return manifest
+
+def _store(county_dir, manifest):
+    with _cache_lock:
+        _cache[os.path.abspath(county_dir)] = (time.monotonic(), manifest)
+    return manifest
+
+def _update(county_dir, update):
+    def apply(current):
+        current = current if current and current.get('version') == MANIFEST_VERSION else _empty_manifest()
+        update(current)
+        return current
+    return _store(county_dir, update_json(get_manifest_path(county_dir), apply, indent=4))
+
+def invalidate(county_dir):
+    with _cache_lock:
+        _cache.pop(os.path.abspath(county_dir), None)
+
+# Manifest for a county directory, from memory when fresh. A directory without a manifest is
+# scanned (and hashed) once and the result written.
+def get_manifest(county_dir, index_files=None):
+    key = os.path.abspath(county_dir)
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached is not None and (key in _watchers or time.monotonic() - cached[0] < MANIFEST_TTL):
+        return cached[1]
+    manifest = read_json(get_manifest_path(county_dir))
+    if not manifest or manifest.get('version') != MANIFEST_VERSION:
+        if not os.path.isdir(county_dir):
+            return _empty_manifest()
+        return _update(county_dir, lambda current: current.update(scan_manifest(county_dir, manifest, index_files)))
+    return _store(county_dir, manifest)
+
+# Record (or drop, if it no longer exists) one file after it was written or removed
+def record_file(county_dir, file_name):
+    entry = describe_file(os.path.join(county_dir, file_name))
+    def update(manifest):
+        if entry is None:
+            manifest['files'].pop(file_name, None)
+        else:
+            manifest['files'][file_name] = entry
+    return _update(county_dir, update)
+
+# Record a freshly saved index: its own file entry, a bumped index_version and the hashes of
+# the source files it was built from (see is_index_current)
+def record_index(county_dir, doc_type, index_file_name, source_file_names, **attrs):
+    index_entry = describe_file(os.path.join(county_dir, index_file_name))
+    def update(manifest):
+        if index_entry is not None:
+            manifest['files'][index_file_name] = index_entry
+        previous = manifest['indexes'].get(doc_type, {})
+        manifest['indexes'][doc_type] = {
+            **attrs,
+            'file': index_file_name,
+            'index_version': previous.get('index_version', 0) + 1,
+            # Absent sources are kept as None, so their later upload makes the index stale
+            'sources': {name: manifest['files'][name]['sha256'] if name in manifest['files'] else None for name in source_file_names},
+            'updated': _now(),
+        }
+    return _update(county_dir, update)
+
+def get_file_entry(manifest, file_name):
+    return manifest['files'].get(file_name)
+
+def has_file(manifest, file_name):
+    return file_name in manifest['files']
+
+# SHA-256 of a stored file from the manifest, re-recorded first if its size or mtime no longer
+# match (e.g. replaced outside the apps without a watcher). None if the file doesn't exist.
+def current_sha256(county_dir, file_name):
+    try:
+        stat = os.stat(os.path.join(county_dir, file_name))
+    except FileNotFoundError:
+        return None
+    entry = get_file_entry(get_manifest(county_dir), file_name)
+    if entry is None or entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime:
+        entry = get_file_entry(record_file(county_dir, file_name), file_name)
+    return entry['sha256'] if entry else None
+
+# Index exists and was built from the files currently stored (indexes recorded by a scan have
+# no sources and count as current)
+def is_index_current(manifest, doc_type):
+    index = manifest['indexes'].get(doc_type)
+    if index is None or index.get('file') not in manifest['files']:
+        return False
+    for name, sha256 in (index.get('sources') or {}).items():
+        entry = manifest['files'].get(name)
+        if (entry['sha256'] if entry else None) != sha256:
+            return False
+    return True
+
+# Watch a county directory and re-record files changed outside the apps (needs watchdog).
+# Returns True if a watcher is running for the directory.
+def start_watcher(county_dir):
+    key = os.path.abspath(county_dir)
+    with _cache_lock:
+        if key in _watchers:
+            return True
+    try:
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+    except ImportError:
+        return False
+
+    class ManifestHandler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.is_directory or event.event_type not in ('created', 'modified', 'moved', 'deleted'):
+                return
+            paths = [event.src_path] + ([event.dest_path] if event.event_type == 'moved' else [])
+            for path in paths:
+                name = os.path.basename(path)
+                if os.path.dirname(os.path.abspath(path)) == key and is_tracked(name):
+                    try:
+                        record_file(county_dir, name)
+                    except OSError:
+                        invalidate(county_dir)
+
+    os.makedirs(county_dir, exist_ok=True)
+    observer = Observer()
+    observer.schedule(ManifestHandler(), county_dir, recursive=False)
+    observer.daemon = True
+    observer.start()
+    with _cache_lock:
+        _watchers[key] = observer
+    return True
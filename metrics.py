@@ -0,0 +1,172 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Prometheus text-format metrics for the Streamlit apps. Each app process records per-county
+# counters and latency histograms here and serves them from a small local HTTP endpoint
+# (http://127.0.0.1:<port>/metrics) that nginx exposes under /metrics/<app> on the root domain.
+# No client library is needed; the exposition format is plain text.
+
+# Script name -> (app label, metrics port). The port can be overridden with METRICS_PORT.
+METRICS_ENDPOINTS = {
+    'app': ('ltho', 9101),
+    'docs': ('docs', 9102),
+    'public_docs': ('public_docs', 9103),
+    'statewide': ('statewide', 9104),
+}
+
+# Seconds; covers a quick search up to a large county's PDF index
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_registry = []
+_registry_lock = threading.Lock()
+_app = {'name': 'unknown'}
+_start_time = time.time()
+_server = None
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = _label_key({'app': _app['name'], **labels})
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._values = {}  # label key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = _label_key({'app': _app['name'], **labels})
+        with self._lock:
+            entry = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    # Observe the duration of the block
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, entry in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, entry):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {entry[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {round(entry[-2], 6)}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {entry[-1]}")
+        return lines
+
+COMPARES = Counter('assessor_compares_total', "LTHO-HO comparisons run, by county and status.")
+COMPARE_SECONDS = Histogram('assessor_compare_seconds', "LTHO-HO comparison latency in seconds.")
+SEARCHES = Counter('assessor_searches_total', "Document searches run, by county, document type and status.")
+SEARCH_SECONDS = Histogram('assessor_search_seconds', "Document search latency in seconds.")
+EXTRACTS = Counter('assessor_extracts_total', "PDF page extractions, by county, document type and status.")
+EXTRACT_SECONDS = Histogram('assessor_extract_seconds', "PDF page extraction latency in seconds.")
+INDEX_JOBS = Counter('assessor_index_jobs_total', "PDF index jobs, by county, document type and status.")
+INDEX_SECONDS = Histogram('assessor_index_seconds', "PDF index job latency in seconds.")
+CACHE_REQUESTS = Counter('assessor_cache_requests_total', "Cache lookups by cache name and result (hit or miss).")
+
+def record_cache(cache, hit, **labels):
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss', **labels)
+
+# Resident set size from /proc (Linux); falls back to the peak RSS elsewhere
+def get_rss_bytes():
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def render():
+    app_labels = _format_labels(_label_key({'app': _app['name']}))
+    lines = [
+        "# HELP process_resident_memory_bytes Resident memory size in bytes.",
+        "# TYPE process_resident_memory_bytes gauge",
+        f"process_resident_memory_bytes{app_labels} {get_rss_bytes()}",
+        "# HELP process_start_time_seconds Start time of the process since unix epoch in seconds.",
+        "# TYPE process_start_time_seconds gauge",
+        f"process_start_time_seconds{app_labels} {round(_start_time, 3)}",
+    ]
+    with _registry_lock:
+        metrics = list(_registry)
+    for metric in metrics:
+        lines += metric.render()
+    return '\n'.join(lines) + '\n'
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0].rstrip('/') not in ('', '/metrics'):
+            self.send_error(404)
+            return
+        body = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+# Start the endpoint once per process (Streamlit re-runs the script, the module stays loaded).
+# script is the app's file name stem; returns the port, or None if the port could not be bound
+# (e.g. a second process of the same app), in which case metrics are still recorded in-process.
+def start_metrics_server(script, host='127.0.0.1'):
+    global _server
+    app_name, default_port = METRICS_ENDPOINTS.get(script, (script, None))
+    _app['name'] = app_name
+    with _registry_lock:
+        if _server is not None:
+            return _server.server_address[1]
+        port = int(os.environ.get('METRICS_PORT') or default_port or 0)
+        if not port:
+            return None
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError:
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name='metrics-server', daemon=True).start()
+        return port
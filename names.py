@@ -0,0 +1,121 @@
+import re
+import threading
+import numpy as np
+import pandas as pd
+
+# Owner-name similarity for compare_excels: how well the applicant's name matches the owner of
+# record on the master list, 0-100, so clerks can review the least similar rows first.
+#
+# Names are normalized (upper case, punctuation, entity words like LLC/TRUST and initials
+# dropped) into a token set, and each token gets a phonetic key (Double Metaphone from the
+# optional metaphone package, `pip install metaphone`; Soundex otherwise), so SMYTH/SMITH or
+# JON/JOHN still match. Soundex is coarser, so scores differ slightly between the two.
+# The score is the overlap coefficient |A & B| / min(|A|, |B|) of the phonetic keys, nudged by
+# the exact-token overlap; co-owners listed on one side only don't lower it.
+#
+# A NameIndex holds the exploded (name, token, key) rows of a name list; pairs are scored with
+# merges and group counts over those rows instead of per-pair Python set operations. The owner
+# index is built once per master list version (get_owner_index).
+
+PHONETIC_WEIGHT = 0.75  # rest is the exact-token overlap
+MAX_OWNER_INDEXES = 32
+
+NAME_STOPWORDS = {
+    'AND', 'THE', 'OF', 'ET', 'AL', 'ETAL', 'ETUX', 'ETVIR',
+    'LLC', 'LLP', 'LP', 'INC', 'CO', 'CORP', 'LTD', 'COMPANY',
+    'TRUST', 'TRUSTEE', 'TRUSTEES', 'TR', 'TTEE', 'REVOCABLE', 'LIVING', 'FAMILY', 'ESTATE',
+    'JR', 'SR', 'II', 'III', 'IV', 'MR', 'MRS', 'MS', 'DR',
+}
+
+_SPLIT_RE = re.compile(r"[^A-Z0-9']+")
+
+try:
+    from metaphone import doublemetaphone
+except ImportError:
+    doublemetaphone = None
+
+PHONETIC_ALGORITHM = 'double_metaphone' if doublemetaphone is not None else 'soundex'
+
+_SOUNDEX_CODES = {c: str(d) for d, letters in enumerate(['AEIOUYHW', 'BFPV', 'CGJKQSXZ', 'DT', 'L', 'MN', 'R']) for c in letters}
+
+def soundex(token):
+    letters = [c for c in token.upper() if c.isalpha()]
+    if not letters:
+        return token
+    code, previous = letters[0], _SOUNDEX_CODES.get(letters[0], '')
+    for c in letters[1:]:
+        digit = _SOUNDEX_CODES.get(c, '')
+        if digit and digit != '0' and digit != previous:
+            code += digit
+        if c not in 'HW':
+            previous = digit
+    return (code + '000')[:4]
+
+def phonetic_key(token):
+    if doublemetaphone is not None:
+        return doublemetaphone(token)[0] or token
+    return soundex(token)
+
+def name_tokens(name):
+    if name is None or (not isinstance(name, str) and pd.isna(name)):
+        return []
+    tokens = _SPLIT_RE.split(str(name).upper().replace("'", ''))
+    return [t for t in dict.fromkeys(tokens) if len(t) > 1 and t not in NAME_STOPWORDS]
+
+class NameIndex:
+    def __init__(self, names):
+        self.names = list(dict.fromkeys(n for n in names if isinstance(n, str) and n))
+        self.ids = {name: i for i, name in enumerate(self.names)}
+        keys = {}
+        rows = []
+        for name_id, name in enumerate(self.names):
+            for token in name_tokens(name):
+                key = keys.get(token)
+                if key is None:
+                    key = keys[token] = phonetic_key(token)
+                rows.append((name_id, token, key))
+        self.terms = pd.DataFrame(rows, columns=['name_id', 'token', 'key'])
+
+    def lookup(self, names):
+        return np.array([self.ids.get(name, -1) if isinstance(name, str) else -1 for name in names], dtype=np.int64)
+
+def _overlap(pairs, left_terms, right_terms, column):
+    left = pairs[['pair', 'left']].merge(left_terms[['name_id', column]].drop_duplicates(), left_on='left', right_on='name_id')
+    right = pairs[['pair', 'right']].merge(right_terms[['name_id', column]].drop_duplicates(), left_on='right', right_on='name_id')
+    shared = left[['pair', column]].merge(right[['pair', column]], on=['pair', column]).groupby('pair').size()
+    smaller = np.minimum(left.groupby('pair').size(), right.groupby('pair').size())
+    return (shared.reindex(smaller.index, fill_value=0) / smaller).reindex(pairs['pair'])
+
+# Similarity (0-100, NaN where either name has no usable tokens) of left_names[i] to
+# right_names[i]; right_index may be a prebuilt index of the right-hand names
+def score_names(left_names, right_names, right_index=None):
+    left_names, right_names = list(left_names), list(right_names)
+    left_index = NameIndex(left_names)
+    if right_index is None:
+        right_index = NameIndex(right_names)
+    pairs = pd.DataFrame({
+        'pair': np.arange(len(left_names)),
+        'left': left_index.lookup(left_names),
+        'right': right_index.lookup(right_names),
+    })
+    phonetic = _overlap(pairs, left_index.terms, right_index.terms, 'key')
+    exact = _overlap(pairs, left_index.terms, right_index.terms, 'token')
+    score = (PHONETIC_WEIGHT * phonetic + (1 - PHONETIC_WEIGHT) * exact) * 100
+    return score.round().to_numpy()
+
+_owner_indexes = {}  # master list version key -> NameIndex
+_owner_indexes_lock = threading.Lock()
+
+# NameIndex of a master list's owner names, built once per key (e.g. loaders.source_key)
+def get_owner_index(key, owner_names):
+    if key is None:
+        return NameIndex(owner_names)
+    with _owner_indexes_lock:
+        index = _owner_indexes.get(key)
+    if index is None:
+        index = NameIndex(owner_names)
+        with _owner_indexes_lock:
+            if len(_owner_indexes) >= MAX_OWNER_INDEXES:
+                _owner_indexes.pop(next(iter(_owner_indexes)))
+            _owner_indexes[key] = index
+    return index
@@ -0,0 +1,79 @@
+import os
+import atexit
+import threading
+import weakref
+from storage import read_json, update_json
+
+# Write-behind store for user preferences (server-side persistence).
+# Prefs are cached in memory per user; save_user_pref only marks a key dirty when its value
+# actually changes, and dirty keys are flushed to disk together after FLUSH_DELAY seconds,
+# when a session ends, or when the process exits.
+
+PREFS_DIR = 'user_prefs'
+FLUSH_DELAY = 5.0  # seconds
+
+_lock = threading.RLock()
+_cache = {}        # username -> prefs dict
+_dirty = {}        # username -> set of keys changed since the last flush
+_flush_timer = None
+
+def get_username():
+    return os.environ.get('REMOTE_USER', 'anonymous').strip().replace(' ', '_')
+
+def get_user_prefs_path(username=None):
+    username = username or get_username()
+    os.makedirs(PREFS_DIR, exist_ok=True)
+    return os.path.join(PREFS_DIR, f"{username}_prefs.json")
+
+def _get_prefs(username):
+    prefs = _cache.get(username)
+    if prefs is None:
+        prefs = read_json(get_user_prefs_path(username), {}) or {}
+        _cache[username] = prefs
+    return prefs
+
+def load_user_pref(key: str, default=None):
+    with _lock:
+        return _get_prefs(get_username()).get(key, default)
+
+def save_user_pref(key: str, value):
+    global _flush_timer
+    username = get_username()
+    with _lock:
+        prefs = _get_prefs(username)
+        if key in prefs and prefs[key] == value:
+            return
+        prefs[key] = value
+        _dirty.setdefault(username, set()).add(key)
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(FLUSH_DELAY, flush_user_prefs)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+# Write dirty keys for one user (or all users) to disk, merged into the file under its lock
+# so keys written by other server processes are kept.
+def flush_user_prefs(username=None):
+    global _flush_timer
+    with _lock:
+        if username is None:
+            _flush_timer = None
+            usernames = list(_dirty)
+        else:
+            usernames = [username] if username in _dirty else []
+        pending = {}
+        for name in usernames:
+            keys = _dirty.pop(name)
+            pending[name] = {key: _cache[name][key] for key in keys}
+    for name, changes in pending.items():
+        update_json(get_user_prefs_path(name), lambda prefs: {**(prefs or {}), **changes}, {})
+
+class _SessionToken:
+    pass
+
+# Object to keep in st.session_state; when the session is dropped its prefs are flushed
+def session_token():
+    token = _SessionToken()
+    weakref.finalize(token, flush_user_prefs, get_username())
+    return token
+
+atexit.register(flush_user_prefs)
@@ -0,0 +1,92 @@
+import io
+import pandas as pd
+from openpyxl.styles import Font, PatternFill
+
+# Report exporters for comparison results: fixed-width TXT, CSV and formatted XLSX.
+# TXT and CSV are produced as generators of text chunks so large results can be written to a
+# file (batch runner) or assembled once (download buttons) without per-row Python loops.
+
+REPORT_CHUNK_ROWS = 5000
+
+# (column, header label, width) of the fixed-width TXT report
+TXT_COLUMNS = [
+    ('Account Number', 'Account Number', 15),
+    ('Name', 'Name', 40),
+    ('Address', 'Address', 30),
+    ('Filer Name', 'Filer Name', 40),
+    ('Filer Address', 'Filer Address', 30),
+    ('Filer Phone', 'Filer Phone #', 20),
+]
+TXT_TITLE = "ALL MATCHING ACCOUNTS WITH DATA FROM HO APPLICANT FILE\n\n"
+TXT_EMPTY = "No matching accounts found."
+
+def _fixed_width_line(values):
+    return ' '.join(str(value).ljust(width) for value, (_, _, width) in zip(values, TXT_COLUMNS)) + '\n'
+
+# Left-justify every column at once and join them into one line per row
+def format_fixed_width(df):
+    lines = None
+    for col, _, width in TXT_COLUMNS:
+        values = df[col] if col in df.columns else pd.Series('', index=df.index)
+        cells = values.astype(object).where(values.notna(), '').astype(str).str.ljust(width)
+        lines = cells if lines is None else lines + ' ' + cells
+    return ''.join((lines + '\n').tolist())
+
+def iter_txt_report(common_all, chunk_rows=REPORT_CHUNK_ROWS):
+    if common_all is None or common_all.empty:
+        yield TXT_EMPTY
+        return
+    yield TXT_TITLE
+    yield _fixed_width_line(label for _, label, _ in TXT_COLUMNS)
+    yield _fixed_width_line('-' * width for _, _, width in TXT_COLUMNS)
+    for start in range(0, len(common_all), chunk_rows):
+        yield format_fixed_width(common_all.iloc[start:start + chunk_rows])
+
+def iter_csv_report(df, chunk_rows=REPORT_CHUNK_ROWS):
+    if df is None:
+        return
+    if df.empty:
+        yield df.to_csv(index=False)
+        return
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=(start == 0))
+
+def txt_report_bytes(common_all):
+    return ''.join(iter_txt_report(common_all)).encode('utf-8')
+
+def csv_report_bytes(df):
+    return ''.join(iter_csv_report(df)).encode('utf-8')
+
+def _format_sheet(ws, df):
+    bold = Font(bold=True)
+    note_fill = PatternFill(start_color='FFF2CC', end_color='FFF2CC', fill_type='solid')
+    for cell in ws[1]:
+        cell.font = bold
+    ws.freeze_panes = 'A2'
+    if df.empty:
+        return
+    for i, col in enumerate(df.columns, start=1):
+        longest = df[col].astype(str).str.len().max()
+        width = min(max(len(str(col)), int(longest) if pd.notna(longest) else 0) + 2, 60)
+        ws.column_dimensions[ws.cell(row=1, column=i).column_letter].width = width
+    # Highlight the "*** The below account has N entries ***" note rows
+    if 'Account Number' in df.columns:
+        is_note = df['Account Number'].astype(str).str.startswith('***').to_numpy()
+        for offset in is_note.nonzero()[0]:
+            for cell in ws[int(offset) + 2]:
+                cell.font = bold
+                cell.fill = note_fill
+
+# Formatted workbook with one sheet per result table, written to a path or file object
+def write_xlsx_report(target, common_all, mr_potentials=None):
+    sheets = [('Matching Accounts', common_all), ('Potential MR Matches', mr_potentials)]
+    with pd.ExcelWriter(target, engine='openpyxl') as writer:
+        for sheet_name, df in sheets:
+            df = df if df is not None else pd.DataFrame()
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+            _format_sheet(writer.sheets[sheet_name], df)
+
+def xlsx_report_bytes(common_all, mr_potentials=None):
+    output = io.BytesIO()
+    write_xlsx_report(output, common_all, mr_potentials)
+    return output.getvalue()
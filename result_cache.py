@@ -0,0 +1,166 @@
+import os
+import io
+import json
+import hashlib
+import pandas as pd
+from storage import atomic_write_bytes, remove_file
+from manifest import current_sha256
+from metrics import record_cache
+from names import PHONETIC_ALGORITHM
+
+# Disk cache of comparison stage results, so comparing the same applicant workbook against the
+# same lists again (a re-upload, or the next day) loads the results instead of recomputing them:
+#
+#   master_lists/{county}/result_cache/<key>.parquet
+#
+# Each stage has its own key: a hash of ENGINE_VERSION, the phonetic algorithm the name scores
+# were computed with (names.PHONETIC_ALGORITHM), the stage, the applicant file's hash,
+# the SHA-256 of the list it was compared against (master.xlsx for 'matches', accounts.xlsx
+# for 'potentials', taken from the county manifest) and the blacklist fingerprint. Replacing
+# one list therefore only recomputes its stage. Only successful results are stored; the
+# stage's warnings travel in the Parquet metadata. When the directory grows past
+# RESULT_CACHE_MAX_BYTES the least recently used entries are removed.
+#
+# Parquet needs pyarrow; without it the cache is disabled and every compare recomputes.
+
+# Bump whenever compare_excels/compare_addresses output changes, so older entries are ignored
+ENGINE_VERSION = 5
+RESULT_CACHE_DIR_NAME = 'result_cache'
+RESULT_CACHE_MAX_BYTES = int(os.environ.get('RESULT_CACHE_MAX_BYTES') or 256 * 1024 * 1024)  # per county
+
+_WARNINGS_KEY = b'assessor.warnings'
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+def get_result_cache_dir(county):
+    return f"master_lists/{county}/{RESULT_CACHE_DIR_NAME}"
+
+# Hash of the applicant input: workbook bytes, or a DataFrame's contents and columns
+def applicant_fingerprint(applicant):
+    digest = hashlib.sha256()
+    if isinstance(applicant, pd.DataFrame):
+        digest.update(json.dumps([str(c) for c in applicant.columns]).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(applicant, index=False).values.tobytes())
+    else:
+        digest.update(bytes(applicant))
+    return digest.hexdigest()
+
+class ResultCache:
+    def __init__(self, cache_dir, max_bytes=RESULT_CACHE_MAX_BYTES, county=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.county = county  # label for the cache hit/miss metrics
+
+    @property
+    def enabled(self):
+        return pq is not None and self.max_bytes > 0
+
+    # Cache key for one stage, or None if the list file doesn't exist or can't be hashed
+    def key(self, stage, applicant_hash, list_path, blacklist):
+        try:
+            list_hash = current_sha256(os.path.dirname(list_path), os.path.basename(list_path))
+        except OSError:
+            return None
+        if list_hash is None:
+            return None
+        parts = [ENGINE_VERSION, PHONETIC_ALGORITHM, stage, applicant_hash, list_hash, blacklist.fingerprint()]
+        return hashlib.sha256(json.dumps(parts).encode('utf-8')).hexdigest()[:40]
+
+    # Keys of both stages of run_comparisons ({'matches': ..., 'potentials': ...}), or {} if disabled
+    def keys(self, applicant, master_path, accounts_path, blacklist):
+        if not self.enabled:
+            return {}
+        applicant_hash = applicant_fingerprint(applicant)
+        return {
+            'matches': self.key('matches', applicant_hash, master_path, blacklist),
+            'potentials': self.key('potentials', applicant_hash, accounts_path, blacklist),
+        }
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    # (DataFrame, warnings) for a key, or None on a miss. Unreadable entries are removed.
+    # Lookups are counted in the cache hit/miss metrics (metrics.record_cache).
+    def get(self, key):
+        if not self.enabled or key is None:
+            return None
+        hit = self._load(key)
+        record_cache('result', hit is not None, county=self.county)
+        return hit
+
+    def _load(self, key):
+        path = self._path(key)
+        try:
+            table = pq.read_table(path)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            remove_file(path)
+            return None
+        try:
+            os.utime(path)  # mtime is the LRU clock
+        except OSError:
+            pass
+        metadata = table.schema.metadata or {}
+        warnings = json.loads(metadata.get(_WARNINGS_KEY, b'[]'))
+        return table.to_pandas(), warnings
+
+    # Store a stage's results atomically, then evict. A frame Parquet can't represent (e.g.
+    # mixed-type object columns) or a failed write just leaves the entry uncached.
+    def put(self, key, df, warnings=()):
+        if not self.enabled or key is None or df is None:
+            return False
+        try:
+            table = pa.Table.from_pandas(df)
+        except (pa.ArrowException, TypeError, ValueError):
+            return False
+        metadata = {**(table.schema.metadata or {}), _WARNINGS_KEY: json.dumps(list(warnings)).encode('utf-8')}
+        table = table.replace_schema_metadata(metadata)
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer, compression='zstd')
+        try:
+            atomic_write_bytes(self._path(key), buffer.getvalue())
+        except OSError:
+            return False
+        self.evict()
+        return True
+
+    # Remove least recently used entries until the directory fits in max_bytes
+    def evict(self):
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith('.parquet'):
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            return 0
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            remove_file(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name.endswith('.parquet'):
+                remove_file(os.path.join(self.cache_dir, name))
+
+def get_result_cache(county):
+    return ResultCache(get_result_cache_dir(county), county=county)
@@ -0,0 +1,200 @@
+import streamlit as st
+import pandas as pd
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from counties import WY_COUNTIES
+from batch_compare import compare_county, new_summary
+from households import find_households
+from loaders import read_table
+from reports import txt_report_bytes
+from metrics import start_metrics_server, record_cache, COMPARES, COMPARE_SECONDS
+
+# Statewide LTHO-HO comparison: one applicant file spanning counties (split on its County
+# column) or one file per county (county taken from the file name), compared per county in
+# parallel worker processes with results streamed into one summary table.
+
+st.set_page_config(page_title="LTHO-HO Compare Tool - Statewide", layout="wide")
+st.title("Statewide LTHO-HO Comparison Tool")
+
+start_metrics_server(os.path.splitext(os.path.basename(__file__))[0])
+
+SUMMARY_COLUMNS = ['County', 'Status', 'Matches', 'Potential M/R', 'Seconds', 'Memory (MB)', 'Error']
+
+# One process pool per server, shared by all sessions; size follows the core count
+@st.cache_resource
+def get_worker_pool():
+    return ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+
+def find_county_col(df):
+    for col in df.columns:
+        if re.search(r'county', str(col), re.I):
+            return col
+    return None
+
+def match_county(text):
+    text = re.sub(r'[\s_\-]+', ' ', str(text)).strip().lower()
+    for county in WY_COUNTIES:
+        if text == county.lower():
+            return county
+    return None
+
+def county_from_filename(file_name):
+    stem = re.sub(r'[\s_\-]+', ' ', os.path.splitext(file_name)[0]).lower()
+    # Longest names first so "Big Horn" wins over any shorter overlap
+    for county in sorted(WY_COUNTIES, key=len, reverse=True):
+        if re.search(rf'\b{county.lower()}\b', stem):
+            return county
+    return None
+
+# Split uploaded applicant files into {county: DataFrame}; returns (per_county, problems)
+def split_applicants(uploaded_files):
+    per_county = {}
+    problems = []
+    for uploaded in uploaded_files:
+        try:
+            df = read_table(uploaded.getvalue())
+        except Exception as e:
+            problems.append(f"{uploaded.name}: could not read file ({str(e)})")
+            continue
+        county_col = find_county_col(df)
+        if county_col is not None:
+            counties = df[county_col].map(match_county)
+            unmatched = df[counties.isna()]
+            if not unmatched.empty:
+                problems.append(f"{uploaded.name}: {len(unmatched)} rows with an unrecognized county were skipped")
+            for county, group in df[counties.notna()].groupby(counties[counties.notna()]):
+                per_county[county] = pd.concat([per_county[county], group]) if county in per_county else group
+        else:
+            county = county_from_filename(uploaded.name)
+            if county is None:
+                problems.append(f"{uploaded.name}: no County column and no county name in the file name")
+                continue
+            per_county[county] = pd.concat([per_county[county], df]) if county in per_county else df
+    return per_county, problems
+
+def summary_row(summary):
+    return {
+        'County': summary['county'],
+        'Status': summary['status'],
+        'Matches': summary['matches'],
+        'Potential M/R': summary['potentials'],
+        'Seconds': summary['seconds'],
+        'Memory (MB)': round(sum(summary.get('memory', {}).values()) / 1e6, 2),
+        'Error': summary['error'],
+    }
+
+if 'statewide_summaries' not in st.session_state:
+    st.session_state.statewide_summaries = {}
+if 'statewide_results' not in st.session_state:
+    st.session_state.statewide_results = {}
+if 'statewide_households' not in st.session_state:
+    st.session_state.statewide_households = None
+if 'statewide_version' not in st.session_state:
+    st.session_state.statewide_version = 0  # Bumped by every statewide run
+if 'statewide_reports' not in st.session_state:
+    st.session_state.statewide_reports = {}
+
+# TXT export of one county's matches, built once per statewide run
+def get_county_report(county, common_all):
+    key = (st.session_state.statewide_version, county)
+    cache = st.session_state.statewide_reports
+    record_cache('report', key in cache, county=county)
+    if key not in cache:
+        for old_key in [k for k in cache if k[0] != key[0]]:
+            del cache[old_key]
+        cache[key] = txt_report_bytes(common_all)
+    return cache[key]
+
+with st.sidebar:
+    with st.expander("Instructions", expanded=False):
+        st.markdown("""
+        - Upload one applicant file with a County column, or one file per county with the county name in the file name.
+        - Each county is compared against the master and accounts lists stored for it on the server.
+        - Counties run in parallel; the summary updates as each county finishes.
+        """)
+
+uploaded_files = st.file_uploader("Upload HO Applicant Excel(s)", type=['xlsx', 'xlsb', 'xls', 'csv'], accept_multiple_files=True)
+
+if uploaded_files and st.button("Run Statewide Compare", type="primary"):
+    per_county, problems = split_applicants(uploaded_files)
+    for problem in problems:
+        st.warning(problem)
+    st.session_state.statewide_summaries = {}
+    st.session_state.statewide_results = {}
+    st.session_state.statewide_version += 1
+    # Shared phones / filer addresses across the whole upload, so households spanning counties show up
+    st.session_state.statewide_households = find_households(
+        pd.concat([df.assign(County=county) for county, df in per_county.items()], ignore_index=True),
+        label_col='County',
+    ) if per_county else None
+    if per_county:
+        progress = st.progress(0.0, text=f"Comparing {len(per_county)} counties...")
+        table = st.empty()
+        rows = {county: summary_row({**new_summary(county), 'status': 'running'}) for county in sorted(per_county)}
+        table.dataframe(pd.DataFrame(list(rows.values()), columns=SUMMARY_COLUMNS), use_container_width=True, hide_index=True)
+
+        pool = get_worker_pool()
+        futures = {pool.submit(compare_county, county, df): county for county, df in per_county.items()}
+        for done, future in enumerate(as_completed(futures), start=1):
+            county = futures[future]
+            try:
+                summary, common_all, mr_potentials = future.result()
+            except Exception as e:
+                summary, common_all, mr_potentials = {**new_summary(county), 'status': 'error', 'error': str(e)}, None, None
+            st.session_state.statewide_summaries[county] = summary
+            COMPARE_SECONDS.observe(summary['seconds'], county=county)
+            COMPARES.inc(county=county, status=summary['status'])
+            st.session_state.statewide_results[county] = (common_all, mr_potentials)
+            rows[county] = summary_row(summary)
+            table.dataframe(pd.DataFrame(list(rows.values()), columns=SUMMARY_COLUMNS), use_container_width=True, hide_index=True)
+            progress.progress(done / len(futures), text=f"{done} of {len(futures)} counties finished")
+        st.rerun()
+
+if st.session_state.statewide_summaries:
+    summaries = [st.session_state.statewide_summaries[c] for c in sorted(st.session_state.statewide_summaries)]
+    summary_df = pd.DataFrame([summary_row(s) for s in summaries], columns=SUMMARY_COLUMNS)
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Counties", len(summaries))
+    col2.metric("Matching Accounts", int(summary_df['Matches'].sum()))
+    col3.metric("Potential M/R Matches", int(summary_df['Potential M/R'].sum()))
+    col4.metric("Errors / Skipped", int((summary_df['Status'] != 'ok').sum()))
+
+    st.subheader("Summary")
+    st.dataframe(summary_df, use_container_width=True, hide_index=True)
+
+    st.subheader("Per-County Results")
+    for summary in summaries:
+        county = summary['county']
+        common_all, mr_potentials = st.session_state.statewide_results.get(county, (None, None))
+        with st.expander(f"{county} - {summary['status']} ({summary['matches']} matches, {summary['potentials']} potential M/R)"):
+            if summary['error']:
+                st.error(summary['error'])
+            for warning in summary['warnings']:
+                st.warning(warning)
+            memory = summary.get('memory', {})
+            if memory:
+                labels = {'applicant': 'applicants', 'matches': 'master list', 'potentials': 'accounts list'}
+                st.caption("Loaded in memory: " + ", ".join(f"{labels.get(stage, stage)} {size / 1e6:.2f} MB" for stage, size in memory.items()))
+            if common_all is not None:
+                st.dataframe(common_all, use_container_width=True)
+                st.download_button(
+                    label="Download as TXT",
+                    data=get_county_report(county, common_all),
+                    file_name=f"{county}_comparison.txt",
+                    mime="text/plain",
+                    key=f"statewide_txt_{county}",
+                )
+            if mr_potentials is not None and not mr_potentials.empty:
+                st.write("**Potential M/R Address Matches**")
+                st.dataframe(mr_potentials, use_container_width=True)
+
+households = st.session_state.statewide_households
+if households is not None:
+    st.subheader("Shared Phone / Filer Address")
+    if households.empty:
+        st.info("No phone number or filer address is shared by applications for different accounts.")
+    else:
+        st.caption(f"{len(households)} phone numbers / filer addresses used for more than one account, across all uploaded counties")
+        st.dataframe(households, use_container_width=True, hide_index=True)
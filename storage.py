@@ -0,0 +1,151 @@
+import os
+import json
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl  # POSIX advisory locks; the servers run Linux
+except ImportError:
+    fcntl = None
+
+# Uploads are copied to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+# Temp file next to dest_path so the final os.replace stays on one filesystem
+def _make_temp_path(dest_path, prefix):
+    dest_dir = os.path.dirname(dest_path) or '.'
+    os.makedirs(dest_dir, exist_ok=True)
+    suffix = os.path.splitext(dest_path)[1]
+    fd, tmp_path = tempfile.mkstemp(dir=dest_dir, prefix=prefix, suffix=suffix)
+    os.chmod(tmp_path, 0o644)
+    return fd, tmp_path
+
+def _fsync_dir(path):
+    dir_path = os.path.dirname(path) or '.'
+    try:
+        dir_fd = os.open(dir_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+# Stream an uploaded file (any readable file object) to dest_path without holding a second
+# copy in memory. The data goes to a temp file first and is renamed into place only after it
+# is fully written and, if given, validate(tmp_path) returns no error message.
+# Returns None on success or the validation error message.
+def save_upload(uploaded_file, dest_path, validate=None):
+    fd, tmp_path = _make_temp_path(dest_path, '.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            uploaded_file.seek(0)
+            shutil.copyfileobj(uploaded_file, f, UPLOAD_CHUNK_SIZE)
+            f.flush()
+            os.fsync(f.fileno())
+        if validate is not None:
+            error = validate(tmp_path)
+            if error:
+                _remove_quietly(tmp_path)
+                return error
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        _remove_quietly(tmp_path)
+        raise
+    return None
+
+# One in-process lock per file, so threads of the same server serialize before taking flock
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+def _get_thread_lock(path):
+    with _thread_locks_guard:
+        lock = _thread_locks.get(path)
+        if lock is None:
+            lock = _thread_locks[path] = threading.Lock()
+        return lock
+
+# Exclusive advisory lock on path (via a sibling .lock file), shared by every session, thread
+# and process that goes through this module. The data file itself is never locked because
+# atomic_write_json replaces it.
+@contextmanager
+def file_lock(path):
+    path = os.path.abspath(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _get_thread_lock(path):
+        with open(path + '.lock', 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+# Write JSON to a temp file, fsync it and rename it over path, so readers only ever see the
+# old or the new complete file. Callers that read-modify-write should hold file_lock(path).
+def atomic_write_json(path, data, **json_kwargs):
+    fd, tmp_path = _make_temp_path(path, '.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, **json_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        _remove_quietly(tmp_path)
+        raise
+    _fsync_dir(path)
+
+# Binary counterpart of atomic_write_json (e.g. for cached Parquet files)
+def atomic_write_bytes(path, data):
+    fd, tmp_path = _make_temp_path(path, '.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        _remove_quietly(tmp_path)
+        raise
+    _fsync_dir(path)
+
+def remove_file(path):
+    _remove_quietly(path)
+
+# Load JSON from path; a missing or unreadable (e.g. truncated) file gives default
+def read_json(path, default=None):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except ValueError:
+        return default
+
+# Locked read-modify-write: update(current) returns the new data, which is written atomically
+# and returned. A corrupt file is kept aside as path + '.corrupt' instead of being overwritten.
+def update_json(path, update, default=None, **json_kwargs):
+    with file_lock(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                current = json.load(f)
+        except FileNotFoundError:
+            current = default
+        except ValueError:
+            os.replace(path, path + '.corrupt')
+            current = default
+        data = update(current)
+        atomic_write_json(path, data, **json_kwargs)
+        return data
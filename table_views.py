@@ -0,0 +1,61 @@
+import math
+import pandas as pd
+
+# Server-side filtering and paging for the result tables, so only the visible page of a large
+# comparison is sent to the browser.
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+# Row filter for a result frame. Account prefix matches any of account_cols, address text
+# matches any of address_cols (case-insensitive), and duplicates_only keeps rows whose
+# duplicate_col value appears more than once. The "*** The below account has N entries ***"
+# note rows in the comparison results are kept only when the row they introduce is kept.
+def filter_frame(df, account_cols, address_cols, account_prefix='', address_contains='',
+                 duplicates_only=False, duplicate_col=None):
+    if df is None or df.empty:
+        return df
+    first_col = account_cols[0]
+    is_note = df[first_col].astype(str).str.startswith('***')
+    mask = pd.Series(True, index=df.index)
+
+    account_prefix = account_prefix.strip().upper()
+    if account_prefix:
+        account_mask = pd.Series(False, index=df.index)
+        for col in account_cols:
+            account_mask |= df[col].astype(str).str.upper().str.startswith(account_prefix)
+        mask &= account_mask
+
+    address_contains = address_contains.strip()
+    if address_contains:
+        address_mask = pd.Series(False, index=df.index)
+        for col in address_cols:
+            address_mask |= df[col].astype(str).str.contains(address_contains, case=False, regex=False, na=False)
+        mask &= address_mask
+
+    if duplicates_only and duplicate_col:
+        values = df[duplicate_col].where(~is_note)
+        mask &= values.notna() & values.duplicated(keep=False)
+
+    # Note rows follow the row after them
+    mask = mask.where(~is_note, mask.shift(-1, fill_value=False) & ~is_note.shift(-1, fill_value=False))
+    return df[mask]
+
+# Order the comparison results by sort_col (lowest first) while keeping each account's rows,
+# and the note row introducing them, together; an account sorts by its lowest value
+def sort_by_group(df, group_col, sort_col):
+    if df is None or df.empty or sort_col not in df.columns:
+        return df
+    is_note = df[group_col].astype(str).str.startswith('***')
+    groups = df[group_col].where(~is_note).bfill()
+    keys = pd.to_numeric(df[sort_col], errors='coerce').groupby(groups).transform('min')
+    order = pd.DataFrame({'key': keys.to_numpy(), 'position': range(len(df))})
+    order = order.sort_values(['key', 'position'], na_position='last', kind='stable')
+    return df.iloc[order['position'].to_numpy()]
+
+def page_count(total_rows, page_size):
+    return max(1, math.ceil(total_rows / page_size))
+
+def get_page(df, page, page_size):
+    page = min(max(1, page), page_count(len(df), page_size))
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size]
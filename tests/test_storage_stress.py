@@ -0,0 +1,14 @@
+from benchmarks.stress_storage import run_stress
+
+# Locked read-modify-write under contention (storage.update_json via add_to_blacklist): every
+# add from every thread of every process must survive.
+
+PROCESSES = 5
+THREADS = 10
+ENTRIES = 10
+
+def test_no_lost_updates_across_processes_and_threads(tmp_path):
+    entries, count = run_stress(str(tmp_path), PROCESSES, THREADS, ENTRIES)
+    expected = PROCESSES * THREADS * ENTRIES
+    assert entries == expected
+    assert count == expected
@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+
+# Lightweight in-process tracing for the hot paths (Excel reads, comparisons, PDF indexing,
+# search and extraction). Each span records its name, start time, duration in ms and any
+# attributes (rows, pages, bytes, ...). Finished spans go into a bounded in-memory buffer that
+# the apps show in an admin expander and can export as JSONL.
+
+MAX_SPANS = 2000
+
+_spans = deque(maxlen=MAX_SPANS)
+_spans_lock = threading.Lock()
+_local = threading.local()
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+# Attributes added to every span recorded by the current thread (e.g. app and county)
+def set_context(**attrs):
+    _local.context = attrs
+
+# Context of the current thread, for handing to worker threads via set_context(**ctx)
+def get_context():
+    return dict(getattr(_local, 'context', {}))
+
+@contextmanager
+def span(name, **attrs):
+    stack = _stack()
+    record = {
+        **getattr(_local, 'context', {}),
+        'name': name,
+        'parent': stack[-1]['name'] if stack else None,
+        'start': round(time.time(), 3),
+        **attrs,
+    }
+    stack.append(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record['error'] = type(e).__name__
+        raise
+    finally:
+        record['ms'] = round((time.perf_counter() - start) * 1000, 3)
+        stack.pop()
+        with _spans_lock:
+            _spans.append(record)
+
+# Add attributes to the innermost open span of this thread (no-op outside a span)
+def annotate(**attrs):
+    stack = _stack()
+    if stack:
+        stack[-1].update(attrs)
+
+def traced(name=None):
+    def decorator(func):
+        span_name = name or func.__name__
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def get_spans():
+    with _spans_lock:
+        return list(_spans)
+
+def clear_spans():
+    with _spans_lock:
+        _spans.clear()
+
+# Per-name count / total / mean / max duration, slowest total first
+def summarize(spans=None):
+    totals = {}
+    for record in spans if spans is not None else get_spans():
+        entry = totals.setdefault(record['name'], {'name': record['name'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        entry['count'] += 1
+        entry['total_ms'] += record['ms']
+        entry['max_ms'] = max(entry['max_ms'], record['ms'])
+    rows = sorted(totals.values(), key=lambda e: e['total_ms'], reverse=True)
+    for entry in rows:
+        entry['mean_ms'] = round(entry['total_ms'] / entry['count'], 3)
+        entry['total_ms'] = round(entry['total_ms'], 3)
+    return rows
+
+def to_jsonl(spans=None):
+    return ''.join(json.dumps(record, default=str) + '\n' for record in (spans if spans is not None else get_spans()))
+
+# Append the buffered spans to a JSONL file for offline analysis; returns the number written
+def export_jsonl(path):
+    spans = get_spans()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(to_jsonl(spans))
+    return len(spans)
+
+# Bytes of a file path or in-memory buffer, for span attributes
+def size_of(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    if isinstance(source, str) and os.path.isfile(source):
+        return os.path.getsize(source)
+    return None
@@ -0,0 +1,257 @@
+import os
+import sys
+import time
+import signal
+import argparse
+import subprocess
+from counties import WY_COUNTIES, SUBDOMAIN_TO_COUNTY
+
+# Per-county worker processes. Each shard (one county or a group of counties) runs its own
+# Streamlit process per app on its own port, so a county indexing a large PDF only competes
+# with the counties in its shard. nginx routes each subdomain to its shard through the map
+# generated here from counties.SUBDOMAIN_TO_COUNTY:
+#
+#   python workers.py start                                       # the default single processes
+#   python workers.py status
+#   python workers.py stop [--shard laramie]
+#   python workers.py supervise [--shard all]                     # foreground; restarts dead workers
+#   python workers.py nginx --output public/county-shards.conf    # sharded nginx map
+#
+# Sharding is opt-in. The committed public/county-shards.conf is the `nginx --single`
+# rendering, which sends every subdomain to the app's default process (8501-8503; the
+# statewide app on 8504 is never sharded). To turn sharding on, start the shard workers
+# (`supervise --shard all`), check `status --shard all` shows them running, and only then
+# install the sharded map: nginx sends each county to its shard's port whether or not a
+# worker listens there.
+#
+# Worker N of an app listens on the app's base port + N and serves metrics (metrics.py) on that
+# port + 1000. Default processes keep the metrics ports in metrics.py (nginx /metrics/<app>);
+# the sharded map adds a <app>_metrics_<shard> upstream per shard worker, which the server
+# blocks expose as /metrics/<app>/<shard> (e.g. /metrics/ltho/laramie).
+
+# Shard name -> counties. The busiest counties get their own process, the rest share regional
+# ones. Every county must appear exactly once.
+SHARDS = {
+    'laramie': ['Laramie'],
+    'natrona': ['Natrona'],
+    'campbell': ['Campbell'],
+    'sweetwater': ['Sweetwater'],
+    'fremont': ['Fremont'],
+    'albany': ['Albany'],
+    'north': ['Sheridan', 'Johnson', 'Big Horn', 'Washakie', 'Hot Springs', 'Park', 'Crook', 'Weston'],
+    'south': ['Carbon', 'Converse', 'Goshen', 'Lincoln', 'Niobrara', 'Platte', 'Sublette', 'Teton', 'Uinta'],
+}
+
+# App name -> (script, first shard port or None if never sharded, default single-process port)
+APPS = {
+    'ltho': ('app.py', 8601, 8501),
+    'docs': ('docs.py', 8701, 8502),
+    'search': ('public_docs.py', 8801, 8503),
+    'statewide': ('statewide.py', None, 8504),
+}
+
+DEFAULT_SHARD = 'default'  # an app's single process serving every county
+
+METRICS_PORT_OFFSET = 1000
+RUN_DIR = os.path.join('run', 'workers')
+LOG_DIR = os.path.join('logs', 'workers')
+STOP_TIMEOUT = 15  # seconds before SIGKILL
+
+def check_shards(shards=SHARDS):
+    assigned = [county for counties in shards.values() for county in counties]
+    unknown = sorted(set(assigned) - set(WY_COUNTIES))
+    missing = sorted(set(WY_COUNTIES) - set(assigned))
+    duplicated = sorted({county for county in assigned if assigned.count(county) > 1})
+    problems = []
+    if unknown:
+        problems.append(f"unknown counties: {', '.join(unknown)}")
+    if missing:
+        problems.append(f"counties without a shard: {', '.join(missing)}")
+    if duplicated:
+        problems.append(f"counties in more than one shard: {', '.join(duplicated)}")
+    return problems
+
+def get_shard_port(app, shard):
+    if shard == DEFAULT_SHARD:
+        return APPS[app][2]
+    return APPS[app][1] + list(SHARDS).index(shard)
+
+def get_shard_for_county(county):
+    return next((shard for shard, counties in SHARDS.items() if county in counties), None)
+
+def is_sharded(app):
+    return APPS[app][1] is not None
+
+# One worker per (app, shard); the default processes unless shards are named ('all': every shard)
+def iter_workers(apps=None, shards=None):
+    shards = shards or [DEFAULT_SHARD]
+    if 'all' in shards:
+        shards = list(SHARDS)
+    for app in apps or APPS:
+        for shard in shards:
+            if shard == DEFAULT_SHARD or is_sharded(app):
+                yield app, shard
+
+def get_pid_path(app, shard):
+    return os.path.join(RUN_DIR, f"{app}-{shard}.pid")
+
+def get_log_path(app, shard):
+    return os.path.join(LOG_DIR, f"{app}-{shard}.log")
+
+def read_pid(app, shard):
+    try:
+        with open(get_pid_path(app, shard), 'r') as f:
+            return int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+def is_running(pid):
+    if not pid:
+        return False
+    try:
+        if os.waitpid(pid, os.WNOHANG)[0] == pid:
+            return False  # Our own child (supervise) that has exited; now reaped
+    except ChildProcessError:
+        pass
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def start_worker(app, shard):
+    pid = read_pid(app, shard)
+    if is_running(pid):
+        return pid
+    script = APPS[app][0]
+    port = get_shard_port(app, shard)
+    os.makedirs(RUN_DIR, exist_ok=True)
+    os.makedirs(LOG_DIR, exist_ok=True)
+    env = dict(os.environ)
+    if shard != DEFAULT_SHARD:
+        env['METRICS_PORT'] = str(port + METRICS_PORT_OFFSET)
+    command = [
+        sys.executable, '-m', 'streamlit', 'run', script,
+        '--server.port', str(port), '--server.address', '127.0.0.1', '--server.headless', 'true',
+    ]
+    with open(get_log_path(app, shard), 'ab') as log:
+        process = subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT,
+                                   stdin=subprocess.DEVNULL, start_new_session=True)
+    with open(get_pid_path(app, shard), 'w') as f:
+        f.write(str(process.pid))
+    return process.pid
+
+def stop_worker(app, shard, timeout=STOP_TIMEOUT):
+    pid = read_pid(app, shard)
+    if is_running(pid):
+        os.killpg(pid, signal.SIGTERM)
+        deadline = time.monotonic() + timeout
+        while is_running(pid) and time.monotonic() < deadline:
+            time.sleep(0.2)
+        if is_running(pid):
+            os.killpg(pid, signal.SIGKILL)
+    try:
+        os.remove(get_pid_path(app, shard))
+    except FileNotFoundError:
+        pass
+
+# Generated nginx config: one upstream per worker (plus one for each shard worker's metrics)
+# and a $subdomain -> upstream map per sharded app. single=True routes every subdomain to the
+# app's default process (sharding off).
+def render_nginx_conf(single=False):
+    command = "python workers.py nginx" + (" --single" if single else "")
+    lines = [
+        f"# Generated by `{command}` from counties.SUBDOMAIN_TO_COUNTY and",
+        "# workers.SHARDS -- do not edit by hand. deploy.sh installs it in /etc/nginx/conf.d/;",
+        "# the server blocks proxy to http://$<app>_upstream, and /metrics/<app>/<shard> to",
+        "# http://<app>_metrics_<shard>.",
+    ]
+    if single:
+        lines.append("# Sharding off: every subdomain goes to the app's default process.")
+    else:
+        lines.append("# Sharded: the shard workers must be running (workers.py status --shard all).")
+    lines.append("")
+    sharded_apps = [app for app in APPS if is_sharded(app)]
+    for app in sharded_apps:
+        lines.append(f"upstream {app}_default {{ server 127.0.0.1:{get_shard_port(app, DEFAULT_SHARD)}; }}")
+        if not single:
+            for shard in SHARDS:
+                lines.append(f"upstream {app}_{shard} {{ server 127.0.0.1:{get_shard_port(app, shard)}; }}")
+            for shard in SHARDS:
+                metrics_port = get_shard_port(app, shard) + METRICS_PORT_OFFSET
+                lines.append(f"upstream {app}_metrics_{shard} {{ server 127.0.0.1:{metrics_port}; }}")
+        lines.append("")
+    for app in sharded_apps:
+        lines.append(f"map $subdomain ${app}_upstream {{")
+        lines.append(f"    default {app}_default;")
+        if not single:
+            for subdomain, county in SUBDOMAIN_TO_COUNTY.items():
+                lines.append(f"    {subdomain} {app}_{get_shard_for_county(county)};")
+        lines.append("}")
+        lines.append("")
+    return '\n'.join(lines)
+
+def print_status(apps, shards):
+    for app, shard in iter_workers(apps, shards):
+        pid = read_pid(app, shard)
+        state = 'running' if is_running(pid) else 'stopped'
+        print(f"{app:<9} {shard:<11} port {get_shard_port(app, shard):<5} {state:<8} {pid or ''}")
+
+# Keep every worker up, restarting any that exit; SIGTERM/SIGINT stops them all
+def supervise(apps, shards, interval=5.0):
+    stopping = []
+    def handle_signal(signum, frame):
+        stopping.append(signum)
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    for app, shard in iter_workers(apps, shards):
+        start_worker(app, shard)
+    while not stopping:
+        time.sleep(interval)
+        for app, shard in iter_workers(apps, shards):
+            if not stopping and not is_running(read_pid(app, shard)):
+                print(f"{app}/{shard} exited; restarting", file=sys.stderr)
+                start_worker(app, shard)
+    for app, shard in iter_workers(apps, shards):
+        stop_worker(app, shard)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Start, stop and route per-county Streamlit workers.")
+    parser.add_argument('command', choices=['start', 'stop', 'restart', 'status', 'supervise', 'nginx'])
+    parser.add_argument('--app', nargs='+', choices=list(APPS), help="Apps to act on (default: all)")
+    parser.add_argument('--shard', nargs='+', choices=[DEFAULT_SHARD, 'all', *SHARDS],
+                        help="Shards to act on; 'all' for every county shard (default: the default processes)")
+    parser.add_argument('--output', help="nginx: write the config here instead of stdout")
+    parser.add_argument('--single', action='store_true', help="nginx: route every county to the default single process")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    problems = check_shards()
+    if problems:
+        print(f"Invalid SHARDS: {'; '.join(problems)}", file=sys.stderr)
+        return 2
+    if args.command == 'nginx':
+        conf = render_nginx_conf(single=args.single)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(conf)
+        else:
+            print(conf, end='')
+        return 0
+    if args.command == 'supervise':
+        supervise(args.app, args.shard)
+        return 0
+    if args.command in ('stop', 'restart'):
+        for app, shard in iter_workers(args.app, args.shard):
+            stop_worker(app, shard)
+    if args.command in ('start', 'restart'):
+        for app, shard in iter_workers(args.app, args.shard):
+            start_worker(app, shard)
+    print_status(args.app, args.shard)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())